@@ -1,133 +1,505 @@
 import streamlit as st
-import PyPDF2
+import functools
+import inspect
+import io
+import os
 import re
-import numpy as np
-from sklearn.linear_model import LinearRegression
-from collections import defaultdict
-from typing import Dict, Optional
+from typing import Dict, List, Optional
+from records import GRADE_LABELS, StudentRecord, SubjectRecord, grade_code
+from utils import lazy_import
+
+np = lazy_import('numpy')
+PyPDF2 = lazy_import('PyPDF2')
+
+SUMMARY_GRADES = ['O', 'A+', 'A', 'B+', 'B', 'C', 'P', 'F']
+_SUMMARY_EXCLUDED = frozenset(['IC', 'ABS', 'N/A', ''])
+_SUMMARY_AS_FAIL = frozenset(['FF', 'Fail'])
+# Subject topper ordering; grades not listed sort after all of these
+TOPPER_GRADE_ORDER = ['O', 'A+', 'A', 'B+', 'B', 'C', 'P', 'F', 'FF', 'Fail', 'AB', 'ABS']
+
+# Bump whenever parse output changes so cached parses of the same PDF are not reused.
+PARSER_VERSION = "2"
+
+# Below this many pages the cost of spawning workers outweighs the gain.
+PARALLEL_EXTRACT_MIN_PAGES = 40
+# Page ranges per extract worker; smaller ranges let streamed parsing start sooner
+PARALLEL_RANGES_PER_WORKER = 4
+
+def _read_pdf_bytes(uploaded_file) -> bytes:
+    if isinstance(uploaded_file, (bytes, bytearray)): return bytes(uploaded_file)
+    if isinstance(uploaded_file, (str, os.PathLike)):
+        with open(uploaded_file, 'rb') as fh: return fh.read()
+    if hasattr(uploaded_file, 'getvalue'): return uploaded_file.getvalue()
+    uploaded_file.seek(0)
+    return uploaded_file.read()
+
+# One alternation per header field plus subject rows, so a block is scanned once.
+# Every alternative starts with a literal (rows are anchored on the preceding newline)
+# so the regex engine can skip ahead on the first character. Only the keywords are
+# consumed and values are captured inside lookaheads, so no token can swallow text
+# another field needs: each field's first match is the one a standalone re.search finds.
+_BLOCK_TOKEN_RE = re.compile(r"""
+      SEAT\ NO\.:(?=\s*(?P<seat>[A-Z0-9]+))
+    | NAME(?=\s*:\s*(?P<name>.*?)\s+MOTHER)
+    | MOTHER(?=\s*:\s*(?P<mother>.*?)\s+PRN)
+    | PRN(?=\s*:\s*(?P<prn>[A-Z0-9]+))
+    | YEAR(?=\s*SGPA\s*:\s*(?P<sgpa>[0-9\.]+|--))
+    | TOTAL\ CREDITS\ EARNED(?=\s*:\s*(?P<credits>\d+))
+    | \n(?=[^\S\n]*(?P<subject>\d{5,}[A-Z]?[^\n]*))
+""", re.VERBOSE)
+_SUBJECT_ROW_RE = re.compile(r'^[^\S\n]*(?=(?P<subject>\d{5,}[A-Z]?[^\n]*))', re.MULTILINE)
+
+def _parse_subject_row(row: str) -> Optional[SubjectRecord]:
+    parts = row.split()
+    if len(parts) <= 6: return None
+    return SubjectRecord(parts[0], " ".join(parts[1:4]), parts[-5])
+
+def _extract_page_range(pdf_bytes: bytes, start: int, stop: int) -> List[str]:
+    reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+    return [reader.pages[i].extract_text() for i in range(start, stop)]
+
+def _memoized(method):
+    """
+    Caches an aggregate until students_data is reassigned. Results are shared
+    between callers, so treat them as read-only.
+    """
+    signature = inspect.signature(method)
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        # Bound with defaults, so f(), f(10) and f(n=10) share one entry
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        key = (method.__name__, tuple(bound.arguments.items())[1:])
+        stats = self.cache_stats.setdefault(method.__name__, {'hits': 0, 'misses': 0})
+        if key in self._memo:
+            stats['hits'] += 1
+            return self._memo[key]
+        stats['misses'] += 1
+        value = self._memo[key] = method(self, *args, **kwargs)
+        return value
+    return wrapper
 
 class AdvancedResultAnalyzer:
-    def __init__(self):
+    def __init__(self, extract_workers: Optional[int] = None):
+        self.data_version = 0
+        self.cache_stats = {}
         self.students_data = []
         self.raw_text = ""
-    
+        # None -> one worker per CPU, 1 -> always extract serially
+        self.extract_workers = extract_workers
+
+    @property
+    def students_data(self):
+        return self._students_data
+
+    @students_data.setter
+    def students_data(self, data):
+        self._students_data = data
+        self.invalidate_cache()
+
+    def invalidate_cache(self):
+        """Drop memoized aggregates; call after mutating students_data in place."""
+        self._memo = {}
+        self.data_version += 1
+
+    @_memoized
+    def get_analysis_table(self) -> Dict[str, 'np.ndarray']:
+        """
+        Scalar per-student fields as NumPy columns, built once per assigned dataset.
+        Row i describes students_data[i].
+        """
+        students = self._students_data
+        if all(isinstance(s, StudentRecord) for s in students):
+            sgpa = np.fromiter((s.sgpa for s in students), dtype=np.float64, count=len(students))
+            credits = np.fromiter((s.credits for s in students), dtype=np.int64, count=len(students))
+            passed_subjects = np.fromiter((s.passed_subjects for s in students), dtype=np.int64, count=len(students))
+            total_subjects = np.fromiter((len(s.subjects) for s in students), dtype=np.int64, count=len(students))
+            has_valid_sgpa = sgpa > 0
+            is_pass = has_valid_sgpa.copy()
+            prn = np.array([s.prn for s in students], dtype=str)
+        else:
+            sgpa = np.array([s.get('SGPA') or 0.0 for s in students], dtype=np.float64)
+            credits = np.array([s.get('Credits') or 0 for s in students], dtype=np.int64)
+            passed_subjects = np.array([s.get('Passed Subjects') or 0 for s in students], dtype=np.int64)
+            total_subjects = np.array([s.get('Total Subjects') or 0 for s in students], dtype=np.int64)
+            has_valid_sgpa = np.array([bool(s.get('Has Valid SGPA')) for s in students], dtype=bool)
+            is_pass = np.array([s.get('Result Status') == 'Pass' for s in students], dtype=bool)
+            prn = np.array([s.get('PRN') or '' for s in students], dtype=str)
+        return {
+            'sgpa': sgpa, 'credits': credits, 'passed_subjects': passed_subjects,
+            'total_subjects': total_subjects, 'has_valid_sgpa': has_valid_sgpa, 'is_pass': is_pass, 'prn': prn
+        }
+        
     def extract_text_from_pdf(self, uploaded_file):
         try:
-            pdf_reader = PyPDF2.PdfReader(uploaded_file)
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text()
+            pdf_bytes = _read_pdf_bytes(uploaded_file)
+            page_count = len(PyPDF2.PdfReader(io.BytesIO(pdf_bytes)).pages)
+            workers = self._extract_worker_count(page_count)
+            if workers > 1:
+                pages = self._iter_pages_parallel(pdf_bytes, page_count, workers)
+            else:
+                pages = _extract_page_range(pdf_bytes, 0, page_count)
+            text = "".join(pages)
             self.raw_text = text
             return text
         except Exception as e:
             st.error(f"Error reading PDF: {str(e)}")
             return None
-    
+
+    def _extract_worker_count(self, page_count: int) -> int:
+        if page_count < PARALLEL_EXTRACT_MIN_PAGES: return 1
+        return min(self.extract_workers or os.cpu_count() or 1, page_count)
+
+    def _iter_pages_parallel(self, pdf_bytes: bytes, page_count: int, workers: int):
+        """Yields page texts in order while worker processes extract the later page ranges."""
+        step = -(-page_count // (workers * PARALLEL_RANGES_PER_WORKER))
+        ranges = [(start, min(start + step, page_count)) for start in range(0, page_count, step)]
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        # fork inside the multithreaded Streamlit server can deadlock the children; spawn starts clean
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        try:
+            futures = [pool.submit(_extract_page_range, pdf_bytes, start, stop) for start, stop in ranges]
+            # Futures are consumed in submission order so page order is preserved
+            for future in futures: yield from future.result()
+        finally:
+            pool.shutdown(cancel_futures=True)
+
+    def iter_pdf_pages(self, uploaded_file):
+        """Page texts in order; large PDFs are extracted by a process pool while earlier pages are consumed."""
+        pdf_bytes = _read_pdf_bytes(uploaded_file)
+        reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+        workers = self._extract_worker_count(len(reader.pages))
+        if workers > 1:
+            yield from self._iter_pages_parallel(pdf_bytes, len(reader.pages), workers)
+            return
+        for page in reader.pages:
+            yield page.extract_text()
+
     def parse_comprehensive_data(self, text):
         students = []
         blocks = re.split(r'(?=SEAT NO\.:)', text)
         
         for block in blocks:
             if "SEAT NO.:" not in block: continue
-            try:
-                seat_match = re.search(r'SEAT NO\.:\s*([A-Z0-9]+)', block)
-                seat_no = seat_match.group(1) if seat_match else "Unknown"
-                name_match = re.search(r'NAME\s*:\s*(.*?)\s+MOTHER', block)
-                name = name_match.group(1).strip() if name_match else "Unknown"
-                mother_match = re.search(r'MOTHER\s*:\s*(.*?)\s+PRN', block)
-                mother = mother_match.group(1).strip() if mother_match else "Unknown"
-                prn_match = re.search(r'PRN\s*:\s*([A-Z0-9]+)', block)
-                prn = prn_match.group(1).strip() if prn_match else "Unknown"
-                sgpa_match = re.search(r'(?:FIRST|SECOND|THIRD|FOURTH)?\s*YEAR\s*SGPA\s*:\s*([0-9\.]+|--)', block)
-                sgpa_raw = sgpa_match.group(1) if sgpa_match else "0.0"
-                try: sgpa = float(sgpa_raw)
-                except: sgpa = 0.0
-                credits_match = re.search(r'TOTAL CREDITS EARNED\s*:\s*(\d+)', block)
-                credits = int(credits_match.group(1)) if credits_match else 0
-                
-                subjects = self.parse_subject_grades(block)
-                passed_subjects = sum(1 for sub in subjects if sub['Grade'] not in ['F', 'FF', 'AB', 'IC', 'ABS', 'Fail'])
-                total_subjects = len(subjects)
-                has_valid_sgpa = sgpa > 0
-                result_status = 'Pass' if has_valid_sgpa else 'Fail'
-                
-                students.append({
-                    'Seat No': seat_no, 'Name': name, 'Mother Name': mother, 'PRN': prn,
-                    'SGPA': sgpa, 'SGPA_Raw': sgpa_raw, 'Credits': credits,
-                    'Subjects': subjects, 'Passed Subjects': passed_subjects,
-                    'Total Subjects': total_subjects, 'Result Status': result_status,
-                    'Has Valid SGPA': has_valid_sgpa
-                })
-            except Exception: continue
+            student = self.parse_student_block(block)
+            if student: students.append(student)
         return students
+
+    def iter_students(self, pages):
+        """
+        Streaming counterpart of parse_comprehensive_data: consumes page texts one at a
+        time and yields each student as soon as the next SEAT NO.: marker closes its block.
+        Only the currently open block is held in memory.
+        """
+        marker = "SEAT NO.:"
+        pending = ""
+        for page_text in pages:
+            pending += page_text or ""
+            start = pending.find(marker)
+            if start == -1:
+                # Keep a possible partial marker split across the page boundary
+                pending = pending[-(len(marker) - 1):]
+                continue
+            while True:
+                end = pending.find(marker, start + len(marker))
+                if end == -1: break
+                student = self.parse_student_block(pending[start:end])
+                if student: yield student
+                start = end
+            pending = pending[start:]
+        if marker in pending:
+            student = self.parse_student_block(pending[pending.find(marker):])
+            if student: yield student
+
+    def parse_student_block(self, block):
+        try:
+            fields = {}
+            subjects = []
+            for match in _BLOCK_TOKEN_RE.finditer("\n" + block):
+                kind = match.lastgroup
+                if kind == 'subject':
+                    subject = _parse_subject_row(match.group('subject'))
+                    if subject: subjects.append(subject)
+                elif kind not in fields:
+                    fields[kind] = match.group(kind)
+            
+            seat_no = fields.get('seat', "Unknown")
+            name = fields['name'].strip() if 'name' in fields else "Unknown"
+            mother = fields['mother'].strip() if 'mother' in fields else "Unknown"
+            prn = fields.get('prn', "Unknown")
+            sgpa_raw = fields.get('sgpa', "0.0")
+            try: sgpa = float(sgpa_raw)
+            except: sgpa = 0.0
+            credits = int(fields['credits']) if 'credits' in fields else 0
+            
+            return StudentRecord(seat_no, name, mother, prn, sgpa, sgpa_raw, credits, subjects)
+        except Exception: return None
     
     def parse_subject_grades(self, block_text):
         subjects = []
-        lines = block_text.split('\n')
-        for line in lines:
-            line = line.strip()
-            if re.match(r'^\d{5,}[A-Z]?', line):
-                parts = line.split()
-                if len(parts) > 6:
-                    grade = parts[-5]
-                    course_code = parts[0]
-                    course_name = " ".join(parts[1:min(len(parts), 4)]) 
-                    subjects.append({'Course Code': course_code, 'Course Name': course_name, 'Grade': grade})
+        for match in _SUBJECT_ROW_RE.finditer(block_text):
+            subject = _parse_subject_row(match.group('subject'))
+            if subject: subjects.append(subject)
         return subjects
     
+    @_memoized
     def get_result_summary(self):
         if not self.students_data: return {}
+        table = self.get_analysis_table()
         total = len(self.students_data)
-        passed = sum(1 for s in self.students_data if s['Result Status'] == 'Pass')
-        valid_sgpa_students = [s for s in self.students_data if s.get('Has Valid SGPA')]
-        avg_sgpa = sum(s['SGPA'] for s in valid_sgpa_students) / len(valid_sgpa_students) if valid_sgpa_students else 0
+        passed = int(table['is_pass'].sum())
+        valid_sgpas = table['sgpa'][table['has_valid_sgpa']]
+        avg_sgpa = float(valid_sgpas.mean()) if valid_sgpas.size else 0
         return {
             'total_students': total, 'passed_students': passed,
             'failed_students': total - passed, 'average_sgpa': round(avg_sgpa, 2),
             'pass_percentage': round((passed / total * 100) if total > 0 else 0, 1)
         }
 
+    def _rank_order(self, idx: 'np.ndarray') -> 'np.ndarray':
+        """idx sorted by SGPA desc, then credits desc, then PRN asc."""
+        table = self.get_analysis_table()
+        return idx[np.lexsort((table['prn'][idx], -table['credits'][idx], -table['sgpa'][idx]))]
+
+    @_memoized
     def get_top_students(self, n=10):
-        valid = [s for s in self.students_data if s.get('Has Valid SGPA')]
-        return sorted(valid, key=lambda x: x['SGPA'], reverse=True)[:n]
+        table = self.get_analysis_table()
+        valid_idx = np.flatnonzero(table['has_valid_sgpa'])
+        if 0 < n < valid_idx.size:
+            # Partial selection: only students at or above the n-th best SGPA get sorted
+            sgpa = table['sgpa'][valid_idx]
+            cutoff = -np.partition(-sgpa, n - 1)[n - 1]
+            valid_idx = valid_idx[sgpa >= cutoff]
+        return [self.students_data[i] for i in self._rank_order(valid_idx)[:max(n, 0)]]
+
+    @_memoized
+    def get_rank_arrays(self) -> Dict[str, 'np.ndarray']:
+        """
+        Per-student rank (1 = best, same ordering as get_top_students) and percentile
+        (share of valid students with a strictly lower SGPA), indexed like students_data.
+        Students without a valid SGPA get rank 0 and percentile NaN.
+        """
+        table = self.get_analysis_table()
+        valid_idx = np.flatnonzero(table['has_valid_sgpa'])
+        rank = np.zeros(len(self.students_data), dtype=np.int64)
+        rank[self._rank_order(valid_idx)] = np.arange(1, valid_idx.size + 1)
+        percentile = np.full(len(self.students_data), np.nan)
+        sorted_sgpa = np.sort(table['sgpa'][valid_idx])
+        percentile[valid_idx] = np.searchsorted(sorted_sgpa, table['sgpa'][valid_idx], side='left') * 100.0 / max(valid_idx.size, 1)
+        return {'rank': rank, 'percentile': percentile}
+
+    def get_student_rank(self, index: int) -> Optional[int]:
+        rank = int(self.get_rank_arrays()['rank'][index])
+        return rank or None
+
+    def get_student_percentile(self, index: int) -> Optional[float]:
+        percentile = self.get_rank_arrays()['percentile'][index]
+        return None if np.isnan(percentile) else round(float(percentile), 1)
     
+    @_memoized
     def get_failed_students(self):
-        return [s for s in self.students_data if s['Result Status'] == 'Fail']
+        table = self.get_analysis_table()
+        return [self.students_data[i] for i in np.flatnonzero(~table['is_pass'])]
+
+    @_memoized
+    def get_valid_sgpas(self) -> 'np.ndarray':
+        table = self.get_analysis_table()
+        return table['sgpa'][table['has_valid_sgpa']]
+
+    @_memoized
+    def get_sgpa_statistics(self) -> Dict:
+        sgpas = self.get_valid_sgpas()
+        if not sgpas.size: return {}
+        values, counts = np.unique(sgpas, return_counts=True)
+        p10, median, p90 = np.percentile(sgpas, [10, 50, 90])
+        return {
+            'mean': float(sgpas.mean()), 'median': float(median), 'mode': float(values[counts.argmax()]),
+            'std': float(sgpas.std()), 'min': float(sgpas.min()), 'max': float(sgpas.max()),
+            'p90': float(p90), 'p10': float(p10)
+        }
         
     def predict_next_sgpa(self, student_history: Dict) -> Optional[float]:
-        results = student_history.get('Results', [])
-        if len(results) < 2: return None
-        sorted_results = results 
-        X = np.array([i for i, r in enumerate(sorted_results)]).reshape(-1, 1)
-        Y = np.array([r.get('SGPA', 0.0) for r in sorted_results])
-        model = LinearRegression()
-        model.fit(X, Y)
-        next_index = len(results)
-        prediction = model.predict([[next_index]])
-        return round(max(0.0, min(10.0, prediction[0])), 2)
+        forecast = self.forecast_next_sgpa([student_history])
+        if forecast['n_results'][0] < 2: return None
+        return float(forecast['prediction'][0])
 
-    def get_subject_grade_summary(self) -> Dict:
-        if not self.students_data: return {}
-        subject_grades = defaultdict(lambda: defaultdict(int))
-        course_code_to_name = {}
+    def forecast_next_sgpa(self, histories: List[Dict]) -> Dict[str, 'np.ndarray']:
+        """
+        Next-SGPA forecast for many students at once: an ordinary least-squares line over
+        each student's SGPA history (exam index 0..n-1) evaluated at index n, solved in
+        closed form on a padded (students x exams) array. Returns arrays aligned with
+        histories: prediction (clipped to 0-10, 2 dp), slope per exam, residual (RMS error
+        of the fit) and n_results. Students with fewer than two results get NaN.
+        Matches the former per-student sklearn fit up to float noise, which can only show
+        as a 0.01 difference when the prediction lands exactly on a rounding tie.
+        """
+        sgpa_lists = [[float(r.get('SGPA', 0.0) or 0.0) for r in h.get('Results', [])] for h in histories]
+        n_results = np.array([len(v) for v in sgpa_lists], dtype=np.int64)
+        width = int(n_results.max()) if n_results.size else 0
+        y = np.zeros((len(sgpa_lists), width))
+        for i, values in enumerate(sgpa_lists): y[i, :len(values)] = values
+        x = np.arange(width, dtype=np.float64)
+        mask = x < n_results[:, None]
+        
+        # Centred form (as sklearn's LinearRegression fits it) for numerically stable slopes
+        n = n_results.astype(np.float64)
+        fit = n_results >= 2
+        with np.errstate(invalid='ignore', divide='ignore'):
+            x_mean = (x * mask).sum(axis=1) / n
+            y_mean = y.sum(axis=1) / n
+            dx = (x - x_mean[:, None]) * mask
+            dy = (y - y_mean[:, None]) * mask
+            slope = np.where(fit, (dx * dy).sum(axis=1) / (dx * dx).sum(axis=1), np.nan)
+            residual = np.where(fit, np.sqrt(((dy - slope[:, None] * dx) ** 2).sum(axis=1) / n), np.nan)
+            intercept = y_mean - x_mean * slope
+            prediction = np.round(np.clip(n * slope + intercept, 0.0, 10.0), 2)
+        return {'prediction': prediction, 'slope': slope, 'residual': residual, 'n_results': n_results}
+
+    @_memoized
+    def get_grade_matrix(self) -> Dict:
+        """
+        Students x subjects grade matrix, built once per dataset. Course codes are interned
+        to column indices and grades stored as records.GRADE_LABELS codes (-1 = not taken).
+        The per-row arrays (row_student, row_col, row_grade, row_name) keep every subject row,
+        including repeats of a course for the same student, for exact counting.
+        """
+        col_of, course_codes = {}, []
+        name_of, names = {}, []
+        row_student, row_col, row_grade, row_name = [], [], [], []
+        for i, student in enumerate(self.students_data):
+            if isinstance(student, StudentRecord):
+                rows = [(sub.code, sub.name, sub.grade_code) for sub in student.subjects]
+            else:
+                rows = [(sub.get('Course Code'), sub.get('Course Name', 'Unknown Subject'), grade_code(sub.get('Grade', 'N/A') or ''))
+                        for sub in student.get('Subjects', [])]
+            for code, name, grade in rows:
+                if not code: continue
+                col = col_of.get(code)
+                if col is None:
+                    col = col_of[code] = len(course_codes)
+                    course_codes.append(code)
+                name_id = name_of.get(name)
+                if name_id is None:
+                    name_id = name_of[name] = len(names)
+                    names.append(name)
+                row_col.append(col)
+                row_name.append(name_id)
+                row_grade.append(grade)
+                row_student.append(i)
         
-        for student in self.students_data:
-            for subject in student.get('Subjects', []):
-                course_code = subject.get('Course Code')
-                course_name = subject.get('Course Name', 'Unknown Subject')
-                grade = subject.get('Grade', 'N/A')
-                if course_code and grade and grade not in ['IC', 'ABS', 'N/A']:
-                    course_code_to_name[course_code] = course_name 
-                    if grade in ['FF', 'Fail']: grade = 'F' 
-                    subject_grades[course_code]['Total Students'] += 1
-                    subject_grades[course_code][grade] += 1
+        row_student = np.array(row_student, dtype=np.int64)
+        row_col = np.array(row_col, dtype=np.int64)
+        row_grade = np.array(row_grade, dtype=np.int16)
+        row_name = np.array(row_name, dtype=np.int64)
+        matrix = np.full((len(self.students_data), len(course_codes)), -1, dtype=np.int16)
+        matrix[row_student, row_col] = row_grade
+        # Column label: the last name seen for the code
+        course_names = list(course_codes)
+        last_rows = len(row_col) - 1 - np.unique(row_col[::-1], return_index=True)[1]
+        for col, row in enumerate(last_rows): course_names[col] = names[row_name[row]]
+        return {
+            'matrix': matrix, 'course_codes': course_codes, 'course_names': course_names, 'names': names,
+            'row_student': row_student, 'row_col': row_col, 'row_grade': row_grade, 'row_name': row_name
+        }
+
+    @_memoized
+    def get_subject_grade_counts(self) -> Dict:
+        """
+        Per-course counts of SUMMARY_GRADES (FF/Fail folded into F; IC/ABS/N/A ignored),
+        counted with one bincount over the grade matrix rows. Courses appear in the order
+        they were first graded, labelled with the name of their last graded row.
+        """
+        gm = self.get_grade_matrix()
+        # Bucket per grade code: 0-7 = SUMMARY_GRADES, 8 = other counted grade, -1 = ignored
+        bucket_of_code = np.array([
+            -1 if g in _SUMMARY_EXCLUDED else SUMMARY_GRADES.index('F') if g in _SUMMARY_AS_FAIL
+            else SUMMARY_GRADES.index(g) if g in SUMMARY_GRADES else len(SUMMARY_GRADES)
+            for g in GRADE_LABELS
+        ], dtype=np.int64)
+        buckets = bucket_of_code[gm['row_grade']]
+        counted = np.flatnonzero(buckets >= 0)
+        n_buckets = len(SUMMARY_GRADES) + 1
+        cols = gm['row_col'][counted]
+        counts = np.bincount(cols * n_buckets + buckets[counted], minlength=len(gm['course_codes']) * n_buckets)
+        counts = counts.reshape(-1, n_buckets)
         
+        order = np.unique(cols, return_index=True)
+        order = order[0][np.argsort(order[1], kind='stable')]
+        last_counted = len(cols) - 1 - np.unique(cols[::-1], return_index=True)[1]
+        name_ids = dict(zip(np.unique(cols).tolist(), gm['row_name'][counted][last_counted].tolist()))
+        return {
+            'course_codes': [gm['course_codes'][c] for c in order],
+            'course_names': [gm['names'][name_ids[c]] for c in order],
+            'grades': list(SUMMARY_GRADES),
+            'counts': counts[order, :len(SUMMARY_GRADES)],
+            'totals': counts[order].sum(axis=1)
+        }
+
+    @_memoized
+    def get_subject_grade_summary(self) -> Dict:
+        if not self.students_data: return {}
+        grade_counts = self.get_subject_grade_counts()
         summary_list = []
-        for code, data in subject_grades.items():
-            row = {'Course Name': course_code_to_name.get(code, code), 'Total Students': data.pop('Total Students')}
-            grades = ['O', 'A+', 'A', 'B+', 'B', 'C', 'P', 'F']
-            for g in grades: row[g] = data.get(g, 0)
+        for name, counts, total in zip(grade_counts['course_names'], grade_counts['counts'].tolist(), grade_counts['totals'].tolist()):
+            row = {'Course Name': name, 'Total Students': total}
+            row.update(zip(SUMMARY_GRADES, counts))
             failures = row['F']
-            row['Failure Rate (%)'] = round((failures / row['Total Students']) * 100, 1) if row['Total Students'] > 0 else 0
+            row['Failure Rate (%)'] = round((failures / total) * 100, 1) if total > 0 else 0
             summary_list.append(row)
-        return summary_list
\ No newline at end of file
+        return summary_list
+
+    @_memoized
+    def get_subject_index(self) -> Dict:
+        """
+        Inverted index from course name and from course code to the subject rows that
+        mention it, as (student indices, grade codes) array views. Built once per dataset
+        by grouping the grade matrix rows, so a lookup costs O(rows returned).
+        """
+        gm = self.get_grade_matrix()
+
+        def group(keys, labels):
+            order = np.argsort(keys, kind='stable')
+            students, grades = gm['row_student'][order], gm['row_grade'][order]
+            bounds = np.searchsorted(keys[order], np.arange(len(labels) + 1))
+            return {label: (students[bounds[k]:bounds[k + 1]], grades[bounds[k]:bounds[k + 1]])
+                    for k, label in enumerate(labels)}
+
+        return {'by_name': group(gm['row_name'], gm['names']), 'by_code': group(gm['row_col'], gm['course_codes'])}
+
+    def get_subject_rows(self, subject: str):
+        """(student indices, grade codes) for a course name, falling back to a course code."""
+        index = self.get_subject_index()
+        rows = index['by_name'].get(subject) or index['by_code'].get(subject)
+        if rows is None:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int16)
+        return rows
+
+    def get_subject_toppers(self, subject: str, n: int = 10):
+        """
+        (student indices, grade codes) of the best n rows for a course: best grade first
+        (TOPPER_GRADE_ORDER), then SGPA descending, ties in upload order.
+        """
+        students, grades = self.get_subject_rows(subject)
+        grade_rank = np.array([TOPPER_GRADE_ORDER.index(g) if g in TOPPER_GRADE_ORDER else 100 for g in GRADE_LABELS])
+        order = np.lexsort((-self.get_analysis_table()['sgpa'][students], grade_rank[grades]))[:n]
+        return students[order], grades[order]
+
+    @_memoized
+    def get_student_index(self) -> Dict:
+        """Name -> student indices (in upload order) and PRN -> first student index."""
+        by_name, by_prn = {}, {}
+        for i, student in enumerate(self.students_data):
+            by_name.setdefault(student.get('Name', 'Unknown'), []).append(i)
+            prn = student.get('PRN')
+            if prn: by_prn.setdefault(prn, i)
+        return {'by_name': by_name, 'by_prn': by_prn, 'names': sorted(by_name)}
+
+    def find_student(self, key: str) -> Optional[Dict]:
+        """First student whose PRN or name equals `key`, or None."""
+        index = self.get_student_index()
+        i = index['by_prn'].get(key)
+        if i is None:
+            matches = index['by_name'].get(key)
+            i = matches[0] if matches else None
+        return None if i is None else self.students_data[i]
@@ -0,0 +1,104 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Tuple
+from analyzer import AdvancedResultAnalyzer
+from parse_cache import get_parse_cache
+
+STATUS_QUEUED = "Queued"
+STATUS_PARSING = "Parsing"
+STATUS_PARSED = "Parsed"
+STATUS_SAVING = "Saving"
+STATUS_SAVED = "Saved"
+STATUS_FAILED = "Failed"
+
+# How often queued parses are checked for having started on a worker
+STATUS_POLL_SECONDS = 0.2
+
+def parse_pdf_bytes(pdf_bytes: bytes) -> Tuple[List[Dict], float]:
+    """Process-pool entry point: stream-parse one PDF without touching Streamlit. Returns (students, seconds)."""
+    start = time.perf_counter()
+    analyzer = AdvancedResultAnalyzer(extract_workers=1)
+    students = list(analyzer.iter_students(analyzer.iter_pdf_pages(pdf_bytes)))
+    return students, time.perf_counter() - start
+
+class BatchIngestor:
+    """
+    Parses many result PDFs concurrently in a bounded process pool and, if a save
+    function is given, archives each one as soon as it is parsed through a separate,
+    smaller thread pool so Firestore write concurrency stays under control.
+    All status callbacks run on the calling thread.
+    """
+    def __init__(self, parse_workers: Optional[int] = None, write_workers: int = 2):
+        self.parse_workers = parse_workers or os.cpu_count() or 1
+        self.write_workers = write_workers
+
+    def run(self, files: List[Tuple[str, bytes]], save_fn: Optional[Callable] = None, on_update: Optional[Callable] = None) -> List[Dict]:
+        """
+        files: (file name, pdf bytes) pairs.
+        save_fn(file_name, students, summary) returns a truthy doc id on success.
+        on_update(statuses) is called after every status change.
+        """
+        statuses = [{'File': name, 'Status': STATUS_QUEUED, 'Students': 0, 'Parse (s)': None, 'Save (s)': None, 'Error': ''} for name, _ in files]
+        results = [None] * len(files)
+        notify = on_update or (lambda _: None)
+        cache = get_parse_cache()
+        pending = {}
+        started = {}
+
+        def handle_parsed(i, students, elapsed):
+            results[i] = students
+            statuses[i].update({'Status': STATUS_PARSED, 'Students': len(students), 'Parse (s)': round(elapsed, 2)})
+            notify(statuses)
+            if not students: statuses[i].update({'Status': STATUS_FAILED, 'Error': 'No student records found'})
+            else: submit_save(i)
+
+        def submit_save(i):
+            if not save_fn or not results[i]: return
+            analyzer = AdvancedResultAnalyzer()
+            analyzer.students_data = results[i]
+            statuses[i]['Status'] = STATUS_SAVING
+            started[i] = time.perf_counter()
+            pending[writer.submit(save_fn, files[i][0], results[i], analyzer.get_result_summary())] = ('save', i)
+
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=min(self.parse_workers, max(len(files), 1)), mp_context=context) as parser, \
+             ThreadPoolExecutor(max_workers=self.write_workers) as writer:
+            for i, (name, pdf_bytes) in enumerate(files):
+                started[i] = time.perf_counter()
+                cache_key = cache.key_for(pdf_bytes)
+                cached = cache.get(cache_key)
+                if cached is not None:
+                    handle_parsed(i, cached, time.perf_counter() - started[i])
+                    continue
+                pending[parser.submit(parse_pdf_bytes, pdf_bytes)] = ('parse', i, cache_key)
+            notify(statuses)
+
+            while pending:
+                done, _ = wait(pending, timeout=STATUS_POLL_SECONDS, return_when=FIRST_COMPLETED)
+                # A file only shows as Parsing once a worker has picked it up
+                started_parsing = [task[1] for future, task in pending.items()
+                                   if task[0] == 'parse' and statuses[task[1]]['Status'] == STATUS_QUEUED and future.running()]
+                for i in started_parsing: statuses[i]['Status'] = STATUS_PARSING
+                if not done:
+                    if started_parsing: notify(statuses)
+                    continue
+                for future in done:
+                    task = pending.pop(future)
+                    i = task[1]
+                    try:
+                        outcome = future.result()
+                    except Exception as e:
+                        statuses[i].update({'Status': STATUS_FAILED, 'Error': str(e)})
+                        continue
+                    if task[0] == 'parse':
+                        students, elapsed = outcome
+                        cache.put(task[2], students)
+                        handle_parsed(i, students, elapsed)
+                    else:
+                        elapsed = round(time.perf_counter() - started[i], 2)
+                        if outcome: statuses[i].update({'Status': STATUS_SAVED, 'Save (s)': elapsed})
+                        else: statuses[i].update({'Status': STATUS_FAILED, 'Save (s)': elapsed, 'Error': 'Cloud save failed'})
+                notify(statuses)
+        return statuses
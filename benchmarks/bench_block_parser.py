@@ -0,0 +1,78 @@
+"""
+Records/sec of the single-pass block tokenizer against the previous per-field
+re.search implementation. Run from the repo root:
+
+    python -m benchmarks.bench_block_parser --students 10000
+"""
+import argparse
+import re
+import time
+
+from analyzer import AdvancedResultAnalyzer
+from benchmarks.synthetic import generate_result_text
+
+def legacy_parse_student_block(block):
+    """The per-field implementation the tokenizer replaced, kept as the baseline."""
+    seat_match = re.search(r'SEAT NO\.:\s*([A-Z0-9]+)', block)
+    seat_no = seat_match.group(1) if seat_match else "Unknown"
+    name_match = re.search(r'NAME\s*:\s*(.*?)\s+MOTHER', block)
+    name = name_match.group(1).strip() if name_match else "Unknown"
+    mother_match = re.search(r'MOTHER\s*:\s*(.*?)\s+PRN', block)
+    mother = mother_match.group(1).strip() if mother_match else "Unknown"
+    prn_match = re.search(r'PRN\s*:\s*([A-Z0-9]+)', block)
+    prn = prn_match.group(1).strip() if prn_match else "Unknown"
+    sgpa_match = re.search(r'(?:FIRST|SECOND|THIRD|FOURTH)?\s*YEAR\s*SGPA\s*:\s*([0-9\.]+|--)', block)
+    sgpa_raw = sgpa_match.group(1) if sgpa_match else "0.0"
+    try: sgpa = float(sgpa_raw)
+    except: sgpa = 0.0
+    credits_match = re.search(r'TOTAL CREDITS EARNED\s*:\s*(\d+)', block)
+    credits = int(credits_match.group(1)) if credits_match else 0
+
+    subjects = []
+    for line in block.split('\n'):
+        line = line.strip()
+        if re.match(r'^\d{5,}[A-Z]?', line):
+            parts = line.split()
+            if len(parts) > 6:
+                subjects.append({'Course Code': parts[0], 'Course Name': " ".join(parts[1:min(len(parts), 4)]), 'Grade': parts[-5]})
+    passed_subjects = sum(1 for sub in subjects if sub['Grade'] not in ['F', 'FF', 'AB', 'IC', 'ABS', 'Fail'])
+    has_valid_sgpa = sgpa > 0
+    return {
+        'Seat No': seat_no, 'Name': name, 'Mother Name': mother, 'PRN': prn,
+        'SGPA': sgpa, 'SGPA_Raw': sgpa_raw, 'Credits': credits,
+        'Subjects': subjects, 'Passed Subjects': passed_subjects,
+        'Total Subjects': len(subjects), 'Result Status': 'Pass' if has_valid_sgpa else 'Fail',
+        'Has Valid SGPA': has_valid_sgpa
+    }
+
+def best_of(repeat, fn, blocks):
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = [fn(b) for b in blocks]
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--students", type=int, default=10000)
+    parser.add_argument("--subjects", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    text = generate_result_text(args.students, args.subjects)
+    blocks = [b for b in re.split(r'(?=SEAT NO\.:)', text) if "SEAT NO.:" in b]
+    analyzer = AdvancedResultAnalyzer()
+
+    legacy_time, legacy = best_of(args.repeat, legacy_parse_student_block, blocks)
+    tokenizer_time, current = best_of(args.repeat, analyzer.parse_student_block, blocks)
+    if legacy != current:
+        raise SystemExit("Tokenizer output differs from the legacy parser")
+
+    print(f"{len(blocks)} students x {args.subjects} subjects ({len(text) / 1e6:.1f} MB of text)")
+    print(f"  legacy re.search : {len(blocks) / legacy_time:10,.0f} records/sec")
+    print(f"  single-pass      : {len(blocks) / tokenizer_time:10,.0f} records/sec")
+    print(f"  speedup          : {legacy_time / tokenizer_time:10.2f}x")
+
+if __name__ == "__main__":
+    main()
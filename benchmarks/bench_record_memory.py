@@ -0,0 +1,47 @@
+"""
+Memory held by parsed students as compact StudentRecord objects versus the
+equivalent plain dicts. Run from the repo root:
+
+    python -m benchmarks.bench_record_memory --students 10000
+"""
+import argparse
+import gc
+import re
+import tracemalloc
+
+from analyzer import AdvancedResultAnalyzer
+from benchmarks.bench_block_parser import legacy_parse_student_block
+from benchmarks.synthetic import generate_result_text
+
+def retained_bytes(build):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    obj = build()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return retained, obj
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--students", type=int, default=10000)
+    parser.add_argument("--subjects", type=int, default=8)
+    args = parser.parse_args()
+
+    text = generate_result_text(args.students, args.subjects)
+    analyzer = AdvancedResultAnalyzer()
+    # Parse once outside the traced window so interned strings are not attributed to either side
+    analyzer.parse_comprehensive_data(text)
+
+    blocks = [b for b in re.split(r'(?=SEAT NO\.:)', text) if "SEAT NO.:" in b]
+    record_bytes, records = retained_bytes(lambda: [analyzer.parse_student_block(b) for b in blocks])
+    dict_bytes, dicts = retained_bytes(lambda: [legacy_parse_student_block(b) for b in blocks])
+    assert dicts == records
+
+    print(f"{len(records)} students x {args.subjects} subjects")
+    print(f"  plain dicts    : {dict_bytes / 2**20:8.2f} MB ({dict_bytes / len(records):,.0f} B/student)")
+    print(f"  StudentRecord  : {record_bytes / 2**20:8.2f} MB ({record_bytes / len(records):,.0f} B/student)")
+    print(f"  saving         : {1 - record_bytes / dict_bytes:8.1%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Cold-start import-time breakdown for the app entry point. Run from the repo root:
+
+    python -m benchmarks.import_time --top 15 --budget-ms 1500
+
+Exits non-zero when the total exceeds --budget-ms or when a heavy library that
+should only load on demand is imported at startup.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+# Loaded lazily by analyzer / ui_renderers / utils; importing any of these at startup is a regression.
+FORBIDDEN_AT_STARTUP = ("pandas", "numpy", "plotly.express", "PyPDF2", "sklearn")
+
+def profile_imports(module="app", repeat=3):
+    """Best-of-`repeat` cumulative import time (microseconds) per module, as reported by -X importtime."""
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    best = None
+    for _ in range(repeat):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=repo_root, capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+        rows = []
+        for line in proc.stderr.splitlines():
+            if not line.startswith("import time:") or "cumulative" in line:
+                continue
+            self_part, cumulative_us, name = line.split("|")
+            depth = (len(name) - len(name.lstrip()) - 1) // 2
+            rows.append((name.strip(), int(self_part.split(":")[1]), int(cumulative_us), depth))
+        total = sum(r[2] for r in rows if r[3] == 0)
+        if best is None or total < best[0]:
+            best = (total, rows)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--module", default="app")
+    parser.add_argument("--top", type=int, default=15, help="Top-level imports to list")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--budget-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    total_us, rows = profile_imports(args.module, args.repeat)
+    direct = sorted((r for r in rows if r[3] <= 1), key=lambda r: -r[2])
+    print(f"import {args.module}: {total_us / 1000:.0f} ms total (best of {args.repeat})")
+    for name, _, cumulative_us, depth in direct[:args.top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {'  ' * depth}{name}")
+
+    loaded = {r[0] for r in rows}
+    offenders = [m for m in FORBIDDEN_AT_STARTUP if m in loaded]
+    failed = False
+    if offenders:
+        print(f"FAIL: loaded at startup: {', '.join(offenders)}")
+        failed = True
+    if args.budget_ms is not None and total_us / 1000 > args.budget_ms:
+        print(f"FAIL: {total_us / 1000:.0f} ms exceeds budget of {args.budget_ms:.0f} ms")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Parser and analyzer benchmark suite on synthetic SPPU-style marksheets.
+
+Times PDF text extraction, block parsing, subject-row parsing and the analyzer
+aggregates separately, reporting records/sec and peak traced memory per stage.
+Run from the repo root:
+
+    python -m benchmarks.run_benchmarks --json bench.json
+    python -m benchmarks.run_benchmarks --sizes 100 1000 --compare bench.json
+"""
+import argparse
+import gc
+import json
+import platform
+import re
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from analyzer import AdvancedResultAnalyzer
+from benchmarks.synthetic import generate_result_pages, build_result_pdf
+
+DEFAULT_SIZES = [100, 1000, 10000, 50000]
+
+def measure(fn, repeat):
+    """Best wall time over `repeat` runs, then one extra traced run for peak memory."""
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    del result
+    gc.collect()
+    tracemalloc.start()
+    result = fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak, result
+
+def run_aggregates(analyzer):
+    # Aggregates are memoized; start cold so every repeat (and the traced run) recomputes them
+    analyzer.invalidate_cache()
+    analyzer.get_result_summary()
+    analyzer.get_top_students(50)
+    analyzer.get_failed_students()
+    analyzer.get_subject_grade_summary()
+
+def bench_size(n_students, n_subjects, repeat, include_pdf, extract_workers=1):
+    pages = generate_result_pages(n_students, n_subjects)
+    text = "".join(pages)
+    analyzer = AdvancedResultAnalyzer(extract_workers=extract_workers)
+    stages = []
+
+    def record(stage, seconds, peak, records):
+        stages.append({'stage': stage, 'students': n_students, 'subjects': n_subjects, 'seconds': round(seconds, 6),
+                       'records_per_sec': round(records / seconds, 1) if seconds else None, 'peak_mb': round(peak / 2**20, 2)})
+
+    if include_pdf:
+        pdf_bytes = build_result_pdf(pages)
+        seconds, peak, _ = measure(lambda: analyzer.extract_text_from_pdf(pdf_bytes), repeat)
+        record('extract_text_from_pdf', seconds, peak, n_students)
+        del pdf_bytes
+
+    seconds, peak, students = measure(lambda: analyzer.parse_comprehensive_data(text), repeat)
+    record('parse_comprehensive_data', seconds, peak, len(students))
+
+    blocks = [b for b in re.split(r'(?=SEAT NO\.:)', text) if "SEAT NO.:" in b]
+    seconds, peak, _ = measure(lambda: [analyzer.parse_subject_grades(b) for b in blocks], repeat)
+    record('parse_subject_grades', seconds, peak, len(blocks))
+    del blocks
+
+    analyzer.students_data = students
+    seconds, peak, _ = measure(lambda: run_aggregates(analyzer), repeat)
+    record('aggregates', seconds, peak, len(students))
+    return stages
+
+def git_revision():
+    try: return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError): return None
+
+def print_table(stages, baseline=None):
+    previous = {(s['stage'], s['students'], s['subjects']): s for s in (baseline or {}).get('results', [])}
+    header = f"{'stage':<26}{'students':>9}{'seconds':>11}{'records/s':>13}{'peak MB':>10}"
+    if previous: header += f"{'vs base':>10}"
+    print(header)
+    for s in stages:
+        line = f"{s['stage']:<26}{s['students']:>9}{s['seconds']:>11.4f}{s['records_per_sec'] or 0:>13,.0f}{s['peak_mb']:>10.2f}"
+        base = previous.get((s['stage'], s['students'], s['subjects']))
+        if base and s['seconds']: line += f"{base['seconds'] / s['seconds']:>9.2f}x"
+        print(line)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parser and analyzer benchmark suite")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Student counts (default: %(default)s)")
+    parser.add_argument("--subjects", type=int, default=8, help="Subjects per student (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per stage; the best is reported (default: %(default)s)")
+    parser.add_argument("--extract-workers", type=int, default=1, help="Processes for PDF extraction; memory of workers is not traced (default: %(default)s)")
+    parser.add_argument("--skip-pdf", action="store_true", help="Skip PDF generation and text extraction")
+    parser.add_argument("--json", dest="json_path", help="Write machine-readable results to this file")
+    parser.add_argument("--compare", help="Baseline JSON from an earlier run; prints speedup per stage")
+    args = parser.parse_args(argv)
+
+    stages = []
+    for n in args.sizes:
+        stages.extend(bench_size(n, args.subjects, args.repeat, not args.skip_pdf, args.extract_workers))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as fh: baseline = json.load(fh)
+    print_table(stages, baseline)
+
+    if args.json_path:
+        report = {'revision': git_revision(), 'python': platform.python_version(), 'platform': platform.platform(),
+                  'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'repeat': args.repeat, 'results': stages}
+        with open(args.json_path, 'w') as fh: json.dump(report, fh, indent=2)
+        print(f"\nWrote {args.json_path}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
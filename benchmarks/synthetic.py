@@ -0,0 +1,84 @@
+import random
+from typing import List
+
+SURNAMES = ["PATIL", "DESHMUKH", "KULKARNI", "JOSHI", "PAWAR", "SHINDE", "JADHAV", "MORE", "GAIKWAD", "CHAVAN"]
+FIRST_NAMES = ["ROHAN", "SAKSHI", "ADITYA", "PRIYA", "OMKAR", "SNEHA", "PRATHAMESH", "NEHA", "YASH", "ANUJA"]
+MOTHER_NAMES = ["SUNITA", "ANITA", "MEENA", "KAVITA", "ASHA", "SHOBHA", "MANISHA", "VAISHALI"]
+COURSES = [
+    "ENGINEERING MATHEMATICS III", "DATA STRUCTURES AND ALGORITHMS", "OBJECT ORIENTED PROGRAMMING",
+    "COMPUTER GRAPHICS", "DIGITAL ELECTRONICS AND LOGIC DESIGN", "DISCRETE MATHEMATICS",
+    "PRINCIPLES OF PROGRAMMING LANGUAGES", "SOFTWARE ENGINEERING", "MICROPROCESSOR",
+    "DATABASE MANAGEMENT SYSTEMS", "THEORY OF COMPUTATION", "SYSTEMS PROGRAMMING AND OPERATING SYSTEM",
+    "COMPUTER NETWORKS AND SECURITY", "ARTIFICIAL INTELLIGENCE", "HUMAN COMPUTER INTERACTION",
+    "DESIGN AND ANALYSIS OF ALGORITHMS",
+]
+GRADES = ["O", "A+", "A", "B+", "B", "C", "P", "F", "FF", "AB", "IC"]
+GRADE_WEIGHTS = [8, 14, 18, 18, 14, 10, 6, 4, 4, 2, 2]
+GRADE_POINTS = {"O": 10, "A+": 9, "A": 8, "B+": 7, "B": 6, "C": 5, "P": 4}
+
+def generate_student_lines(index: int, n_subjects: int, rng: random.Random) -> List[str]:
+    """Lines of one SPPU-style marksheet block, in the layout PyPDF2 extracts them."""
+    name = f"{rng.choice(SURNAMES)} {rng.choice(FIRST_NAMES)} {rng.choice(FIRST_NAMES)}"
+    lines = [
+        f"SEAT NO.: S{400000000 + index} NAME : {name} MOTHER : {rng.choice(MOTHER_NAMES)} PRN : {72200000 + index}F CLG.: CEGP010530",
+        "COURSE NAME ISE ESE TOTAL TW PR OR TUT Tot% Crd Grd GP CP P&R ORD",
+    ]
+    failed = False
+    credits_earned = 0
+    for j in range(n_subjects):
+        grade = rng.choices(GRADES, GRADE_WEIGHTS)[0]
+        credits = 4 if j % 3 else 3
+        gp = GRADE_POINTS.get(grade, 0)
+        failed = failed or gp == 0
+        credits_earned += credits if gp else 0
+        ise, ese = rng.randint(5, 30), rng.randint(10, 70)
+        lines.append(
+            f"{210240 + j}{'A' if j % 5 == 4 else ''} {COURSES[j % len(COURSES)]} * {ise:03d}/030 {ese:03d}/070 "
+            f"{ise + ese:03d}/100 $ $ $ $ {ise + ese} {credits} {grade} {gp} {gp * credits} - -"
+        )
+    sgpa = "--" if failed else f"{rng.uniform(5.0, 10.0):.2f}"
+    lines.append(f"SECOND YEAR SGPA : {sgpa} TOTAL CREDITS EARNED : {credits_earned}")
+    return lines
+
+def generate_result_pages(n_students: int, n_subjects: int = 8, students_per_page: int = 3, seed: int = 42) -> List[str]:
+    rng = random.Random(seed)
+    pages, current = [], []
+    for i in range(n_students):
+        current.extend(generate_student_lines(i, n_subjects, rng))
+        if (i + 1) % students_per_page == 0:
+            pages.append("\n".join(current) + "\n")
+            current = []
+    if current: pages.append("\n".join(current) + "\n")
+    return pages
+
+def generate_result_text(n_students: int, n_subjects: int = 8, seed: int = 42) -> str:
+    return "".join(generate_result_pages(n_students, n_subjects, seed=seed))
+
+def _pdf_escape(line: str) -> str:
+    return line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+def build_result_pdf(pages: List[str]) -> bytes:
+    """Minimal text-only PDF (Helvetica, one text line per marksheet line) that PyPDF2 can extract."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in pages:
+        page_id = len(objects) + 1
+        kids.append(f"{page_id} 0 R")
+        stream = "BT /F1 7 Tf 20 780 Td 9 TL " + " ".join(f"({_pdf_escape(line)}) '" for line in page.splitlines()) + " ET"
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << /Font << /F1 3 0 R >> >> /Contents {page_id + 1} 0 R >>".encode())
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream".encode())
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>".encode()
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    out += f"trailer << /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+def generate_result_pdf(n_students: int, n_subjects: int = 8, seed: int = 42) -> bytes:
+    return build_result_pdf(generate_result_pages(n_students, n_subjects, seed=seed))
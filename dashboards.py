@@ -1,9 +1,145 @@
 import streamlit as st
 import datetime
+import os
 from analyzer import AdvancedResultAnalyzer
+from parse_cache import get_parse_cache
+from records import StudentRecord
+from batch_ingest import BatchIngestor, STATUS_SAVED, STATUS_FAILED
 from ui_renderers import *
 from utils import flatten_student_data_for_export, convert_df_to_excel
 
+def parse_uploaded_pdf(analyzer, uploaded, stream_parse=True):
+    # Every widget interaction reruns the script; reuse the parse of identical bytes
+    cache = get_parse_cache()
+    cache_key = cache.key_for(uploaded.getvalue())
+    data = cache.get(cache_key)
+    if data is None:
+        data = _parse_pdf(analyzer, uploaded, stream_parse)
+        if data is not None: cache.put(cache_key, data)
+    return cache_key, data
+
+def get_session_analyzer(dataset_key, load_students):
+    """
+    Keeps the analyzer for the dataset on screen in session state, so its memoized
+    aggregates survive reruns. load_students is only called for a new dataset.
+    """
+    cached = st.session_state.get('session_analyzer')
+    if cached and cached[0] == dataset_key: return cached[1]
+    analyzer = AdvancedResultAnalyzer()
+    analyzer.students_data = load_students()
+    st.session_state.session_analyzer = (dataset_key, analyzer)
+    return analyzer
+
+# Suggestions shown under a student search box
+SEARCH_SUGGESTIONS = 20
+
+def search_student_prn(fm, label, placeholder, key, label_visibility="visible"):
+    """
+    Name/PRN search box backed by the shared student search index. Only the top matches
+    for the typed text go into the selectbox, not every student. Returns the chosen PRN.
+    """
+    query = st.text_input(label, placeholder=placeholder, key=f"{key}_query", label_visibility=label_visibility)
+    if not query.strip(): return None
+    matches = fm.get_student_search_index().query(query, k=SEARCH_SUGGESTIONS)
+    if not matches:
+        st.info("No students match that name or PRN.")
+        return None
+    selection = st.selectbox(
+        "Matching Students",
+        options=[f"{name} | {prn}" for prn, name, _ in matches],
+        index=None,
+        placeholder=f"{len(matches)} match(es) - select a profile...",
+        key=f"{key}_pick",
+        label_visibility="collapsed"
+    )
+    return selection.split(" | ")[-1] if selection else None
+
+ANALYSIS_SECTIONS = [
+    ("Overview", render_overview_dashboard, "overview"),
+    ("Top Performers", render_top_performers, "top"),
+    ("Failures", render_failed_analysis, "fail"),
+    ("Subject Analysis", render_subject_summary, "sub"),
+    ("Detailed List", render_detailed_data, "detailed"),
+    ("Advanced Insights", render_advanced_analytics, "adv"),
+]
+
+def _render_section(render, analyzer, key_prefix):
+    render(analyzer, key_prefix)
+
+# A fragment reruns on its own when one of its widgets changes, instead of the whole page
+_fragment = getattr(st, 'fragment', None) or getattr(st, 'experimental_fragment', None)
+if _fragment: _render_section = _fragment(_render_section)
+
+def render_analysis_sections(analyzer, key_prefix):
+    """
+    Shows the analysis sections behind a selector. Unlike st.tabs, only the selected
+    section's charts and exports are computed on a rerun.
+    """
+    render_full_export(analyzer, f"{key_prefix}_full")
+    labels = [label for label, _, _ in ANALYSIS_SECTIONS]
+    if hasattr(st, 'segmented_control'):
+        choice = st.segmented_control("Section", labels, default=labels[0], key=f"{key_prefix}_section", label_visibility="collapsed")
+    else:
+        choice = st.radio("Section", labels, horizontal=True, key=f"{key_prefix}_section", label_visibility="collapsed")
+    label, render, suffix = next((sec for sec in ANALYSIS_SECTIONS if sec[0] == choice), ANALYSIS_SECTIONS[0])
+    _render_section(render, analyzer, f"{key_prefix}_{suffix}")
+
+def _parse_pdf(analyzer, uploaded, stream_parse):
+    if not stream_parse:
+        text = analyzer.extract_text_from_pdf(uploaded)
+        return analyzer.parse_comprehensive_data(text) if text else None
+    
+    data = []
+    progress = st.empty()
+    try:
+        for student in analyzer.iter_students(analyzer.iter_pdf_pages(uploaded)):
+            data.append(student)
+            if len(data) % 25 == 0:
+                progress.caption(f"⏳ Parsed {len(data)} student records...")
+    except Exception as e:
+        st.error(f"Error reading PDF: {str(e)}")
+        return None
+    finally:
+        progress.empty()
+    return data
+
+def show_batch_upload(fm):
+    st.subheader("Batch Upload Result PDFs")
+    uploads = st.file_uploader("Choose PDFs", type="pdf", accept_multiple_files=True, key="batch_files")
+    c1, c2, c3, c4 = st.columns([2, 1, 1, 1])
+    with c1:
+        exam_suffix = st.text_input("Exam Session", placeholder="e.g., May 2024", help="Appended to each file name to form its Exam Name.")
+    with c2:
+        department = st.selectbox("Department", ["Computer", "IT", "Mechanical", "Civil", "Electrical", "AIDS", "E&TC", "General Science"], key="batch_dept")
+    with c3:
+        year = st.selectbox("Year", ["FE", "SE", "TE", "BE"], key="batch_year")
+    with c4:
+        write_workers = st.number_input("Parallel Saves", min_value=1, max_value=8, value=2, help="Concurrent Firestore writes.")
+    
+    if not uploads: return
+    if not st.button(f"🚀 Parse & Save {len(uploads)} Files", type="primary"): return
+    
+    def exam_tag_for(file_name):
+        stem = os.path.splitext(file_name)[0].replace('_', ' ')
+        return f"{stem} {exam_suffix}".strip()
+    
+    uploaded_by = st.session_state.user['name']
+    def save(file_name, students, summary):
+        return fm.save_result_data(file_name, exam_tag_for(file_name), department, year, students, uploaded_by, summary, notify=False)
+    
+    progress = st.empty()
+    def show_progress(statuses):
+        done = sum(1 for s in statuses if s['Status'] in (STATUS_SAVED, STATUS_FAILED))
+        with progress.container():
+            st.progress(done / len(statuses), text=f"{done} of {len(statuses)} files processed")
+            st.dataframe(statuses, use_container_width=True, hide_index=True)
+    
+    statuses = BatchIngestor(write_workers=int(write_workers)).run([(f.name, f.getvalue()) for f in uploads], save, show_progress)
+    saved = sum(1 for s in statuses if s['Status'] == STATUS_SAVED)
+    students = sum(s['Students'] for s in statuses if s['Status'] == STATUS_SAVED)
+    if saved == len(statuses): st.success(f"Archived {saved} files ({students} student records).")
+    else: st.warning(f"Archived {saved} of {len(statuses)} files. Check the Error column for the rest.")
+
 def show_teacher_dashboard(fm):
     # Navigation Bar (Top)
     nav_options = ["📤 Upload", "📂 Saved", "🔍 Search", "🏛️ Overview", "🚪 Logout"]
@@ -15,6 +151,11 @@ def show_teacher_dashboard(fm):
         st.session_state.last_nav_choice = choice
 
     if choice == "📤 Upload":
+        upload_mode = st.radio("Upload Mode", ["Single PDF", "Batch Upload"], horizontal=True, key="upload_mode")
+        if upload_mode == "Batch Upload":
+            show_batch_upload(fm)
+            return
+        
         st.subheader("Upload Result PDF")
         uploaded = st.file_uploader("Choose PDF", type="pdf")
         c1, c2, c3 = st.columns([2, 1, 1])
@@ -25,22 +166,16 @@ def show_teacher_dashboard(fm):
         with c3:
             year = st.selectbox("Year", ["FE", "SE", "TE", "BE"])
         
+        stream_parse = st.toggle("Stream records while parsing", value=True, help="Parse page by page and show progress; keeps memory flat on very large PDFs.")
+        
         if uploaded and exam_tag:
-            analyzer = AdvancedResultAnalyzer()
-            text = analyzer.extract_text_from_pdf(uploaded)
-            if text:
-                data = analyzer.parse_comprehensive_data(text)
+            cache_key, data = parse_uploaded_pdf(AdvancedResultAnalyzer(), uploaded, stream_parse)
+            if data is not None:
                 if data:
-                    analyzer.students_data = data
+                    analyzer = get_session_analyzer(cache_key, lambda: data)
                     st.success(f"Successfully processed {len(data)} student records")
                     
-                    t1, t2, t3, t4, t5, t6 = st.tabs(["Overview", "Top Performers", "Failures", "Subject Analysis", "Detailed List", "Advanced Insights"]) 
-                    with t1: render_overview_dashboard(analyzer, "upload_overview")
-                    with t2: render_top_performers(analyzer, "upload_top")
-                    with t3: render_failed_analysis(analyzer, "upload_fail")
-                    with t4: render_subject_summary(analyzer, "upload_sub")
-                    with t5: render_detailed_data(analyzer, "upload_detailed")
-                    with t6: render_advanced_analytics(analyzer, "upload_adv")
+                    render_analysis_sections(analyzer, "upload")
                     
                     if st.button("💾 Save Data to Cloud", type="primary"):
                         summary = analyzer.get_result_summary()
@@ -58,19 +193,16 @@ def show_teacher_dashboard(fm):
                 st.rerun()
             
             st.markdown(f"### 📊 Analysis: {f.get('exam_tag', 'Unknown')}")
-            analyzer = AdvancedResultAnalyzer()
-            analyzer.students_data = f.get('students_data', [])
+            def load_students():
+                # The grid only lists metadata; the student payload is fetched when a file is opened
+                with st.spinner("Loading student records..."):
+                    return [StudentRecord.from_dict(s) for s in fm.iter_file_students(f)]
+            analyzer = get_session_analyzer(f"saved_{f['id']}", load_students)
             
-            t1, t2, t3, t4, t5, t6 = st.tabs(["Overview", "Top Performers", "Failures", "Subject Analysis", "Detailed List", "Advanced Insights"]) 
-            with t1: render_overview_dashboard(analyzer, f"saved_{f['id']}_overview")
-            with t2: render_top_performers(analyzer, f"saved_{f['id']}_top")
-            with t3: render_failed_analysis(analyzer, f"saved_{f['id']}_fail")
-            with t4: render_subject_summary(analyzer, f"saved_{f['id']}_sub")
-            with t5: render_detailed_data(analyzer, f"saved_{f['id']}_detailed")
-            with t6: render_advanced_analytics(analyzer, f"saved_{f['id']}_adv")
+            render_analysis_sections(analyzer, f"saved_{f['id']}")
         else:
             st.subheader("Archived Results")
-            files = fm.get_all_result_files()
+            files = fm.list_result_files()
             
             # --- FILTERS ---
             with st.container(border=True):
@@ -133,19 +265,9 @@ def show_teacher_dashboard(fm):
     elif choice == "🔍 Search":
         st.subheader("Global Student Search")
         
-        identifiers_map = fm.get_all_student_identifiers()
-        search_options = [f"{name} | {prn}" for prn, name in identifiers_map.items()]
-        
-        final_selection_str = st.selectbox(
-            "Search Student", 
-            options=search_options,
-            index=None,
-            placeholder="🔍 Type Name or PRN to Search...",
-            label_visibility="collapsed"
-        )
-
-        if final_selection_str:
-            final_search_prn = final_selection_str.split(" | ")[-1]
+        final_search_prn = search_student_prn(fm, "Search Student", "🔍 Type Name or PRN to Search...", key="teacher_search", label_visibility="collapsed")
+
+        if final_search_prn:
             with st.spinner(f"Loading history..."):
                 history_results = fm.get_student_history(final_search_prn) 
                 analyzer = AdvancedResultAnalyzer()
@@ -177,19 +299,10 @@ def show_student_dashboard(fm):
     st.markdown('<div class="glass-card">', unsafe_allow_html=True)
     st.markdown("#### <i class='fas fa-search'></i> Find Your Records", unsafe_allow_html=True)
     
-    identifiers_map = fm.get_all_student_identifiers()
-    search_options = [f"{name} | {prn}" for prn, name in identifiers_map.items()]
-    
-    final_selection_str = st.selectbox(
-        "Confirm Identity", 
-        options=search_options,
-        index=None,
-        placeholder="Select Your Profile..."
-    )
+    final_search_prn = search_student_prn(fm, "Confirm Identity", "Type your name or PRN...", key="student_search")
     st.markdown('</div>', unsafe_allow_html=True)
 
-    if final_selection_str:
-        final_search_prn = final_selection_str.split(" | ")[-1]
+    if final_search_prn:
         with st.spinner(f"Retrieving academic records..."):
             history_results = fm.get_student_history(final_search_prn)
             analyzer = AdvancedResultAnalyzer()
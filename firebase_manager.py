@@ -2,12 +2,147 @@ import streamlit as st
 import requests
 import datetime
 import hashlib
+import json
+import os
+import random
+import threading
 import time
+import zlib
+from collections import deque
+from collections.abc import Mapping
 from typing import List, Dict
+from urllib.parse import quote, urlencode, urlsplit
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError
 from firebase_config import FIREBASE_CONFIG
+from search_index import StudentSearchIndex
 
 
-FIREBASE_REST_URL = f"https://firestore.googleapis.com/v1/projects/{FIREBASE_CONFIG['projectId']}/databases/(default)/documents"
+FIREBASE_DOC_ROOT = f"projects/{FIREBASE_CONFIG['projectId']}/databases/(default)/documents"
+FIREBASE_REST_URL = f"https://firestore.googleapis.com/v1/{FIREBASE_DOC_ROOT}"
+
+# Fields the Saved grid and the institutional overview need; excludes legacy inline students_data
+RESULT_FILE_META_FIELDS = ['file_name', 'exam_tag', 'department', 'year', 'uploaded_by', 'uploaded_at', 'total_students', 'summary', 'student_chunks']
+
+# Students are stored in result_files/{id}/student_chunks/{n} documents of this many records,
+# keeping each well under Firestore's 1 MiB document limit
+STUDENT_CHUNK_SIZE = 100
+# documents:commit accepts at most 500 writes and a 10 MiB request
+COMMIT_MAX_WRITES = 500
+COMMIT_MAX_BYTES = 8 * 2**20
+
+# PRN -> name search directory, spread over this many student_directory/{n} documents. Every PRN
+# is a map field, and a document holds at most 20,000 fields (40,000 index entries) and 1 MiB:
+# 256 shards keep ~2,000 entries each at 500k students
+DIRECTORY_SHARDS = 256
+
+def indexed_prn(student: Dict) -> str:
+    """The PRN a student is indexed under, or '' when the sheet gave none (parsed as 'Unknown')."""
+    prn = (student.get('PRN') or '').strip()
+    return '' if prn == 'Unknown' else prn
+
+def directory_shard(prn: str) -> int:
+    return zlib.crc32(prn.encode()) % DIRECTORY_SHARDS
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def _load_student_directory(_fm, version: int) -> Dict[str, str]:
+    # Keyed on the directory version only: one shared copy per version for every session
+    identifiers = {}
+    for doc in _fm.list_documents("student_directory", page_size=DIRECTORY_SHARDS):
+        identifiers.update(_fm._convert_from_firestore(doc).get('entries', {}))
+    return dict(sorted(identifiers.items(), key=lambda item: (item[1], item[0])))
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def _load_student_search_index(_fm, version: int) -> StudentSearchIndex:
+    return StudentSearchIndex(_load_student_directory(_fm, version))
+
+@st.cache_resource(ttl=3600, max_entries=1, show_spinner=False)
+def _scan_student_search_index(_fm) -> StudentSearchIndex:
+    # Until the directory is built: indexed from a full archive scan, refreshed hourly like the scan
+    return StudentSearchIndex(_fm._scan_student_identifiers())
+
+# Name searches read at most this many students/{PRN} records, in one documents:batchGet
+NAME_SEARCH_LIMIT = 50
+
+# HTTP settings, shared by every FirebaseManager in the process (sessions, batch save threads)
+HTTP_POOL_SIZE = int(os.environ.get("RESULT_HTTP_POOL_SIZE", "16"))
+HTTP_TIMEOUT = (float(os.environ.get("RESULT_HTTP_CONNECT_TIMEOUT", "5")), float(os.environ.get("RESULT_HTTP_READ_TIMEOUT", "30")))
+HTTP_MAX_RETRIES = int(os.environ.get("RESULT_HTTP_MAX_RETRIES", "4"))
+RETRYABLE_STATUSES = frozenset([429, 500, 502, 503, 504])
+# Safe to resend after a timeout or server error; other methods must opt in with idempotent=True
+IDEMPOTENT_METHODS = frozenset(["GET", "HEAD", "PUT", "DELETE", "OPTIONS"])
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 8.0
+
+_http_session = None
+_http_session_lock = threading.Lock()
+# Most recent calls, one entry per attempt (deque appends are thread-safe)
+_request_log = deque(maxlen=500)
+
+def get_http_session() -> requests.Session:
+    """Process-wide keep-alive session, so repeated calls reuse TCP/TLS connections."""
+    global _http_session
+    if _http_session is None:
+        with _http_session_lock:
+            if _http_session is None:
+                session = requests.Session()
+                session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE))
+                _http_session = session
+    return _http_session
+
+def _backoff_delay(attempt, response=None):
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after and retry_after.isdigit():
+        return min(float(retry_after), BACKOFF_MAX_SECONDS)
+    # Full jitter: uniform over [0, base * 2^attempt], capped
+    return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+def _connect_failed(error) -> bool:
+    """True when the request failed while connecting, i.e. before the server could have received it."""
+    if isinstance(error, requests.ConnectTimeout): return True
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(reason, ConnectTimeoutError)  # also covers refused connections and DNS failures
+
+def http_request(method: str, url: str, idempotent: bool = None, **kwargs) -> requests.Response:
+    """
+    Sends a request on the shared session with default timeouts. Connection errors,
+    timeouts and RETRYABLE_STATUSES are retried up to HTTP_MAX_RETRIES times with
+    exponential backoff and jitter (Retry-After is honoured). Every attempt is logged.
+    Requests that are not idempotent (POST by default) are only retried when they never
+    reached the server: connect failures and 429.
+    """
+    kwargs.setdefault("timeout", HTTP_TIMEOUT)
+    if idempotent is None: idempotent = method in IDEMPOTENT_METHODS
+    endpoint = urlsplit(url).path.split("/documents", 1)[-1] or urlsplit(url).path
+    for attempt in range(HTTP_MAX_RETRIES + 1):
+        response = None
+        start = time.perf_counter()
+        try:
+            response = get_http_session().request(method, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            _request_log.append({"method": method, "endpoint": endpoint, "status": None, "seconds": time.perf_counter() - start, "attempt": attempt})
+            if attempt == HTTP_MAX_RETRIES or not (idempotent or _connect_failed(e)): raise
+        else:
+            _request_log.append({"method": method, "endpoint": endpoint, "status": response.status_code, "seconds": time.perf_counter() - start, "attempt": attempt})
+            retryable = response.status_code in RETRYABLE_STATUSES if idempotent else response.status_code == 429
+            if not retryable or attempt == HTTP_MAX_RETRIES: return response
+        time.sleep(_backoff_delay(attempt, response))
+
+def get_request_latencies(last: int = None) -> List[Dict]:
+    """Recent HTTP attempts (method, endpoint, status, seconds, attempt), oldest first."""
+    entries = list(_request_log)
+    return entries[-last:] if last else entries
+
+def get_request_latency_summary() -> Dict:
+    """Count, retries, mean / p50 / p95 / max seconds over the logged attempts."""
+    entries = list(_request_log)
+    if not entries: return {"count": 0, "retries": 0, "mean": 0.0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+    seconds = sorted(e["seconds"] for e in entries)
+    pick = lambda q: seconds[min(len(seconds) - 1, int(q * len(seconds)))]
+    return {
+        "count": len(entries), "retries": sum(1 for e in entries if e["attempt"] > 0),
+        "mean": sum(seconds) / len(seconds), "p50": pick(0.5), "p95": pick(0.95), "max": seconds[-1]
+    }
 
 class FirebaseManager:
     def __init__(self):
@@ -24,7 +159,7 @@ class FirebaseManager:
         try:
             auth_url = f"https://identitytoolkit.googleapis.com/v1/accounts:signInWithPassword?key={FIREBASE_CONFIG['apiKey']}"
             auth_data = {"email": email, "password": password, "returnSecureToken": True}
-            response = requests.post(auth_url, json=auth_data)
+            response = http_request("POST", auth_url, idempotent=True, json=auth_data)
             result = response.json()
             if response.status_code == 200:
                 self._set_session_token(result.get('idToken'), result.get('localId'))
@@ -38,7 +173,7 @@ class FirebaseManager:
         try:
             auth_url = f"https://identitytoolkit.googleapis.com/v1/accounts:signUp?key={FIREBASE_CONFIG['apiKey']}"
             auth_data = {"email": email, "password": password, "displayName": name, "returnSecureToken": True}
-            response = requests.post(auth_url, json=auth_data)
+            response = http_request("POST", auth_url, json=auth_data)
             result = response.json()
             if response.status_code == 200:
                 self._set_session_token(result.get('idToken'), result.get('localId'))
@@ -48,15 +183,14 @@ class FirebaseManager:
         except Exception as e:
             return False, str(e)
     
-    def firestore_request(self, method, path, data=None):
+    def firestore_request(self, method, path, data=None, idempotent=None):
         if not self.id_token: return None
-        url = f"{FIREBASE_REST_URL}/{path}"
+        # ":commit" style paths are methods on the database root, not documents under it
+        url = f"{FIREBASE_REST_URL}{path}" if path.startswith(":") else f"{FIREBASE_REST_URL}/{path}"
         headers = {"Authorization": f"Bearer {self.id_token}", "Content-Type": "application/json"}
         try:
-            if method == "GET": response = requests.get(url, headers=headers)
-            elif method == "POST": response = requests.post(url, headers=headers, json=data)
-            elif method == "PATCH": response = requests.patch(url, headers=headers, json=data)
-            elif method == "DELETE": response = requests.delete(url, headers=headers)
+            if method in ("POST", "PATCH"): response = http_request(method, url, idempotent=idempotent, headers=headers, json=data)
+            elif method in ("GET", "DELETE"): response = http_request(method, url, idempotent=idempotent, headers=headers)
             else: return None
             
             if response.status_code not in [200, 201, 409]:
@@ -75,8 +209,8 @@ class FirebaseManager:
         elif isinstance(value, float): return {"doubleValue": value}
         elif isinstance(value, str): return {"stringValue": value}
         elif isinstance(value, datetime.datetime): return {"timestampValue": value.isoformat() + "Z"}
-        elif isinstance(value, list): return {"arrayValue": {"values": [self._to_firestore_value(v) for v in value]}}
-        elif isinstance(value, dict): return {"mapValue": {"fields": {k: self._to_firestore_value(v) for k, v in value.items()}}}
+        elif isinstance(value, (list, tuple)): return {"arrayValue": {"values": [self._to_firestore_value(v) for v in value]}}
+        elif isinstance(value, Mapping): return {"mapValue": {"fields": {k: self._to_firestore_value(v) for k, v in value.items()}}}
         else: return {"stringValue": str(value)}
 
     def create_user(self, email: str, password: str, role: str, name: str):
@@ -123,58 +257,267 @@ class FirebaseManager:
         }
         return True, user_data
 
-    def save_result_data(self, file_name: str, exam_tag: str, department: str, year: str, students_data: List[Dict], uploaded_by: str, summary: Dict):
+    def commit_writes(self, writes: List[Dict]) -> bool:
+        """
+        Applies Firestore write objects through documents:commit, split into requests within the
+        commit limits. The writes are sets and keyed field updates, so a resent commit is harmless.
+        """
+        batch, batch_bytes = [], 0
+        for write in writes:
+            size = len(json.dumps(write))
+            if batch and (len(batch) >= COMMIT_MAX_WRITES or batch_bytes + size > COMMIT_MAX_BYTES):
+                if not self.firestore_request("POST", ":commit", {"writes": batch}, idempotent=True): return False
+                batch, batch_bytes = [], 0
+            batch.append(write)
+            batch_bytes += size
+        return not batch or bool(self.firestore_request("POST", ":commit", {"writes": batch}, idempotent=True))
+
+    def save_result_data(self, file_name: str, exam_tag: str, department: str, year: str, students_data: List[Dict], uploaded_by: str, summary: Dict, notify: bool = True):
         if not self.id_token: return None
         
-        batch_data = {
-            "fields": {
-                "file_name": self._to_firestore_value(file_name),
-                "exam_tag": self._to_firestore_value(exam_tag),
-                "department": self._to_firestore_value(department),
-                "year": self._to_firestore_value(year),
-                "uploaded_by": self._to_firestore_value(uploaded_by),
-                "uploaded_at": self._to_firestore_value(datetime.datetime.utcnow()),
-                "total_students": self._to_firestore_value(len(students_data)),
-                "students_data": self._to_firestore_value(students_data),
-                "summary": self._to_firestore_value(summary)
+        # Derived from the content, so retrying a failed save (or saving the same sheet again)
+        # rewrites the same file and index rows instead of adding another copy
+        content = json.dumps([file_name, exam_tag, department, year, students_data], default=dict)
+        doc_id = f"result_{hashlib.md5(content.encode()).hexdigest()[:20]}"
+        doc_name = f"{FIREBASE_DOC_ROOT}/result_files/{doc_id}"
+        uploaded_at = datetime.datetime.utcnow()
+        chunks = [students_data[i:i + STUDENT_CHUNK_SIZE] for i in range(0, len(students_data), STUDENT_CHUNK_SIZE)]
+        writes = [{
+            "update": {
+                "name": f"{doc_name}/student_chunks/{n:05d}",
+                "fields": {"index": self._to_firestore_value(n), "students": self._to_firestore_value(chunk)}
             }
-        }
+        } for n, chunk in enumerate(chunks)]
+        writes.extend(self._student_index_writes(doc_id, exam_tag, uploaded_at, students_data))
+        writes.extend(self._directory_writes(students_data))
+        # The file document goes last: a listed file always has all of its chunks and index rows,
+        # and a failed save leaves nothing listed that a retry would duplicate
+        writes.append({
+            "update": {
+                "name": doc_name,
+                "fields": {
+                    "file_name": self._to_firestore_value(file_name),
+                    "exam_tag": self._to_firestore_value(exam_tag),
+                    "department": self._to_firestore_value(department),
+                    "year": self._to_firestore_value(year),
+                    "uploaded_by": self._to_firestore_value(uploaded_by),
+                    "uploaded_at": self._to_firestore_value(uploaded_at),
+                    "total_students": self._to_firestore_value(len(students_data)),
+                    "student_chunks": self._to_firestore_value(len(chunks)),
+                    "summary": self._to_firestore_value(summary)
+                }
+            }
+        })
         
-        doc_id = f"result_{int(time.time())}_{hashlib.md5(file_name.encode()).hexdigest()[:10]}"
+        # notify=False lets batch uploads save from worker threads without Streamlit UI calls
+        if not notify:
+            return doc_id if self.commit_writes(writes) else None
         with st.spinner("Saving data to Cloud..."):
-            result = self.firestore_request("POST", f"result_files?documentId={doc_id}", batch_data)
+            result = self.commit_writes(writes)
         
         if result:
             st.success("Success! Data archived securely.")
             return doc_id
         return None
 
-    def get_all_result_files(self):
+    def list_documents(self, collection: str, fields: List[str] = None, page_size: int = 300):
+        """
+        Yields every raw document of a collection, following nextPageToken. With fields,
+        only those top-level fields are returned (Firestore field mask).
+        """
+        params = [("pageSize", page_size)] + [("mask.fieldPaths", f) for f in (fields or [])]
+        page_token = None
+        while True:
+            query = urlencode(params + ([("pageToken", page_token)] if page_token else []))
+            result = self.firestore_request("GET", f"{collection}?{query}")
+            if not result: return
+            yield from result.get('documents', [])
+            page_token = result.get('nextPageToken')
+            if not page_token: return
+
+    def list_result_files(self, fields: List[str] = RESULT_FILE_META_FIELDS, page_size: int = 300):
+        """All result files, newest first. By default only metadata and summary are fetched; pass fields=None for full documents."""
         if not self.id_token: return []
-        result = self.firestore_request("GET", "result_files")
-        if not result or 'documents' not in result: return []
-        
         files = []
-        for doc in result['documents']:
+        for doc in self.list_documents("result_files", fields, page_size):
             file_data = self._convert_from_firestore(doc)
             file_data['id'] = doc['name'].split('/')[-1]
             files.append(file_data)
         return sorted(files, key=lambda x: x.get('uploaded_at', ''), reverse=True)
 
+    def get_result_file(self, doc_id: str):
+        """One result file document (metadata, plus students_data for files saved before chunking), or None."""
+        if not self.id_token: return None
+        doc = self.firestore_request("GET", f"result_files/{doc_id}")
+        if not doc or 'fields' not in doc: return None
+        file_data = self._convert_from_firestore(doc)
+        file_data['id'] = doc_id
+        return file_data
+
+    def get_student_chunk(self, doc_id: str, index: int) -> List[Dict]:
+        """The students of one chunk of a file, for partial reads."""
+        doc = self.firestore_request("GET", f"result_files/{doc_id}/student_chunks/{index:05d}")
+        return self._convert_from_firestore(doc).get('students', []) if doc else []
+
+    def iter_student_chunks(self, doc_id: str, page_size: int = 10):
+        """Yields a file's student chunks in order, page_size chunk documents per request."""
+        for doc in self.list_documents(f"result_files/{doc_id}/student_chunks", page_size=page_size):
+            yield self._convert_from_firestore(doc).get('students', [])
+
+    def iter_file_students(self, file_data: Dict):
+        """
+        Streams the students of a listed or fetched file. Files saved before chunking keep
+        students_data inline, which is fetched in full if the listing masked it out.
+        """
+        if 'students_data' in file_data:
+            yield from file_data['students_data']
+        elif file_data.get('student_chunks') is not None:
+            for chunk in self.iter_student_chunks(file_data['id']): yield from chunk
+        else:
+            yield from (self.get_result_file(file_data['id']) or {}).get('students_data', [])
+
+    def get_student_directory_version(self):
+        """Current student directory version, or None if the directory has not been built yet."""
+        meta = self.firestore_request("GET", "meta/student_directory")
+        if not meta or 'fields' not in meta: return None
+        return self._convert_from_firestore(meta).get('version', 0)
+
+    def get_student_search_index(self) -> StudentSearchIndex:
+        """
+        Search index over the student directory, built once per directory version and shared by
+        all sessions. The shards are only re-read when the version changes, i.e. after a save or backfill.
+        """
+        version = self.get_student_directory_version()
+        if version is None:
+            return _scan_student_search_index(self)  # directory not built yet; see backfill_student_index
+        return _load_student_search_index(self, version)
+
     @st.cache_data(ttl=3600)
-    def get_all_student_identifiers(_self):
-        files = _self.get_all_result_files()
+    def _scan_student_identifiers(_self):
+        files = _self.list_result_files()
         identifiers = {}
         for file_data in files:
-            for student in file_data.get('students_data', []):
+            for student in _self.iter_file_students(file_data):
                 prn = student.get('PRN', '').strip()
                 name = student.get('Name', '').strip()
                 if prn:
                     identifiers[prn] = name
         return identifiers
 
+    def _directory_writes(self, students) -> List[Dict]:
+        """
+        Merges PRN -> name entries into the student_directory shards (one write per shard
+        touched) and bumps meta/student_directory.version so cached copies reload.
+        """
+        shards = {}
+        for student in students:
+            prn = indexed_prn(student)
+            if prn: shards.setdefault(directory_shard(prn), {})[prn] = (student.get('Name') or '').strip()
+        if not shards: return []
+        writes = [{
+            "update": {"name": f"{FIREBASE_DOC_ROOT}/student_directory/{shard:03d}", "fields": {"entries": self._to_firestore_value(entries)}},
+            "updateMask": {"fieldPaths": [f"entries.`{prn}`" for prn in entries]}
+        } for shard, entries in sorted(shards.items())]
+        writes.append({
+            "update": {"name": f"{FIREBASE_DOC_ROOT}/meta/student_directory"},
+            "updateMask": {"fieldPaths": []},
+            "updateTransforms": [{"fieldPath": "version", "increment": {"integerValue": "1"}}]
+        })
+        return writes
+
+    def _student_index_writes(self, file_id: str, exam_tag: str, uploaded_at, students) -> List[Dict]:
+        """
+        Upserts into students/{PRN}: the latest name / mother name, plus this file's row under
+        results.{file_id}. Rows are keyed by file, so saving or backfilling the same file twice
+        overwrites its row instead of adding another.
+        """
+        writes = []
+        for student in students:
+            prn = indexed_prn(student)
+            if not prn: continue
+            row = {
+                'file_id': file_id, 'exam': exam_tag, 'date': uploaded_at,
+                'sgpa': student.get('SGPA', 0), 'result': student.get('Result Status'), 'credits': student.get('Credits'),
+                'seat': student.get('Seat No'), 'subjects': student.get('Subjects', [])
+            }
+            writes.append({
+                "update": {
+                    "name": f"{FIREBASE_DOC_ROOT}/students/{prn}",
+                    "fields": {
+                        "prn": self._to_firestore_value(prn),
+                        "name": self._to_firestore_value(student.get('Name')),
+                        "mother": self._to_firestore_value(student.get('Mother Name')),
+                        "results": self._to_firestore_value({file_id: row})
+                    }
+                },
+                "updateMask": {"fieldPaths": ["prn", "name", "mother", f"results.`{file_id}`"]}
+            })
+        return writes
+
+    def backfill_student_index(self, on_progress=None) -> int:
+        """
+        Adds every archived file to the students/{PRN} index and the student directory. Safe to
+        rerun; files are replayed oldest first so the newest name wins. Returns the number of files indexed.
+        """
+        files = self.list_result_files()[::-1]
+        for done, file_data in enumerate(files, 1):
+            uploaded_at = file_data.get('uploaded_at')
+            if isinstance(uploaded_at, datetime.datetime) and uploaded_at.tzinfo:
+                uploaded_at = uploaded_at.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+            exam_tag = file_data.get('exam_tag', file_data.get('file_name', 'Unknown Exam'))
+            students = list(self.iter_file_students(file_data))
+            writes = self._student_index_writes(file_data['id'], exam_tag, uploaded_at, students) + self._directory_writes(students)
+            if not self.commit_writes(writes):
+                return done - 1
+            if on_progress: on_progress(done, len(files))
+        return len(files)
+
+    def get_indexed_student_history(self, prn: str):
+        """A student's history from students/{PRN} in a single read, or None if the PRN is not indexed."""
+        doc = self.firestore_request("GET", f"students/{quote(prn, safe='')}")
+        if not doc or 'fields' not in doc: return None
+        return self._indexed_history(doc, prn)
+
+    def get_indexed_student_histories(self, prns: List[str]) -> Dict[str, Dict]:
+        """PRN -> history for several students in one documents:batchGet; PRNs that are not indexed are left out."""
+        if not prns: return {}
+        result = self.firestore_request("POST", ":batchGet", {"documents": [f"{FIREBASE_DOC_ROOT}/students/{prn}" for prn in prns]}, idempotent=True)
+        histories = {}
+        for item in result or []:
+            doc = item.get('found')
+            if doc and 'fields' in doc:
+                history = self._indexed_history(doc, doc['name'].rsplit('/', 1)[-1])
+                histories[history['PRN']] = history
+        return histories
+
+    def _indexed_history(self, doc, prn: str):
+        data = self._convert_from_firestore(doc)
+        results = []
+        for row in data.get('results', {}).values():
+            date = row.get('date')
+            if isinstance(date, str):
+                try: date = datetime.datetime.fromisoformat(date.replace('Z', '+00:00'))
+                except ValueError: pass
+            results.append({
+                'Exam': row.get('exam'), 'Date': date, 'SGPA': row.get('sgpa', 0), 'Result': row.get('result'),
+                'Credits': row.get('credits'), 'Seat': row.get('seat'), 'Subjects': row.get('subjects', [])
+            })
+        results.sort(key=lambda x: x['Date'] if isinstance(x['Date'], datetime.datetime) else datetime.datetime.min)
+        return {'Name': data.get('name'), 'PRN': data.get('prn', prn), 'Mother': data.get('mother'), 'Results': results}
+
     def get_student_history(self, search_term: str):
-        files = self.get_all_result_files()
+        # Exact PRNs are answered from the students/{PRN} index; anything the index cannot answer scans the archive
+        indexed = self.get_indexed_student_history(search_term.strip()) if search_term.strip() else None
+        if indexed: return [indexed]
+        # Other spellings of a PRN, and names (at most NAME_SEARCH_LIMIT matches), resolve through the search index
+        version = self.get_student_directory_version() if search_term.strip() else None
+        if version is not None:
+            index = _load_student_search_index(self, version)
+            prn = index.find_prn(search_term)
+            prns = [prn] if prn else [index.prns[i] for i in index.substring_matches(search_term)[:NAME_SEARCH_LIMIT]]
+            histories = self.get_indexed_student_histories(prns)
+            if prns and len(histories) == len(prns): return [histories[prn] for prn in prns]
+        files = self.list_result_files()
         student_history = {}
         search_term = search_term.lower().strip()
         
@@ -182,7 +525,7 @@ class FirebaseManager:
             exam_tag = file_data.get('exam_tag', file_data.get('file_name', 'Unknown Exam'))
             upload_date = file_data.get('uploaded_at')
             
-            for student in file_data.get('students_data', []):
+            for student in self.iter_file_students(file_data):
                 s_name = student.get('Name', '').lower()
                 s_prn = student.get('PRN', '').strip()
                 is_match = (search_term == s_prn.lower()) or (search_term in s_name)
@@ -232,7 +575,7 @@ class FirebaseManager:
                 vals = value['arrayValue'].get('values', [])
                 result[key] = [self._convert_single_value(i) for i in vals]
             elif 'mapValue' in value:
-                result[key] = self._convert_from_firestore({'fields': value['mapValue']['fields']})
+                result[key] = self._convert_from_firestore({'fields': value['mapValue'].get('fields', {})})
         return result
 
     def _convert_single_value(self, value):
@@ -240,5 +583,5 @@ class FirebaseManager:
         elif 'integerValue' in value: return int(value['integerValue'])
         elif 'doubleValue' in value: return float(value['doubleValue'])
         elif 'booleanValue' in value: return value['booleanValue']
-        elif 'mapValue' in value: return self._convert_from_firestore({'fields': value['mapValue']['fields']})
+        elif 'mapValue' in value: return self._convert_from_firestore({'fields': value['mapValue'].get('fields', {})})
         return None
\ No newline at end of file
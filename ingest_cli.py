@@ -0,0 +1,156 @@
+"""
+Headless bulk ingestion of result PDFs, for backfilling archives without a browser.
+
+    python ingest_cli.py archive/2023/ --department Computer --year SE --exam-tag "{stem} May 2023" --output se_2023.parquet
+    python ingest_cli.py "archive/**/*.pdf" --department IT --year TE --push --email teacher@college.edu
+    python ingest_cli.py archive/ --department Civil --year BE --dry-run
+    python ingest_cli.py --backfill-index --email teacher@college.edu
+"""
+import argparse
+import getpass
+import glob
+import os
+import sys
+import time
+from typing import List
+from batch_ingest import BatchIngestor, STATUS_FAILED
+
+DEPARTMENTS = ["Computer", "IT", "Mechanical", "Civil", "Electrical", "AIDS", "E&TC", "General Science"]
+YEARS = ["FE", "SE", "TE", "BE"]
+
+def collect_pdf_paths(inputs: List[str]) -> List[str]:
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            matches = glob.glob(os.path.join(item, "**", "*.pdf"), recursive=True)
+        else:
+            matches = glob.glob(item, recursive=True)
+        paths.extend(p for p in sorted(matches) if p.lower().endswith(".pdf"))
+    return list(dict.fromkeys(paths))
+
+def write_output(rows, output_path: str):
+    import pandas as pd
+    from utils import flatten_student_data_for_export, write_csv_chunked, write_parquet_chunked
+    frames = []
+    for meta, students in rows:
+        df = flatten_student_data_for_export(students)
+        for column, value in reversed(list(meta.items())): df.insert(0, column, value)
+        frames.append(df)
+    df = pd.concat(frames, ignore_index=True)
+    if output_path.lower().endswith(".parquet"): return write_parquet_chunked(df, output_path)
+    return write_csv_chunked(df, output_path)
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Parse result PDFs in bulk and archive them.", epilog=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("inputs", nargs="*", help="PDF files, directories (searched recursively) or glob patterns")
+    parser.add_argument("--exam-tag", default="{stem}", help="Exam name; {stem} is replaced by the file name without extension (default: %(default)s)")
+    parser.add_argument("--department", choices=DEPARTMENTS, help="Required when ingesting")
+    parser.add_argument("--year", choices=YEARS, help="Required when ingesting")
+    parser.add_argument("--workers", type=int, default=None, help="Parallel parse processes (default: CPU count)")
+    parser.add_argument("--output", help="Write flattened records to a .parquet or .csv file")
+    parser.add_argument("--push", action="store_true", help="Save each file to the Firestore archive")
+    parser.add_argument("--write-workers", type=int, default=2, help="Concurrent Firestore writes when pushing (default: %(default)s)")
+    parser.add_argument("--email", default=os.environ.get("RESULT_ANALYZER_EMAIL"), help="Teacher account used with --push (env: RESULT_ANALYZER_EMAIL)")
+    parser.add_argument("--password", default=os.environ.get("RESULT_ANALYZER_PASSWORD"), help="Password for --email (env: RESULT_ANALYZER_PASSWORD; prompted if missing)")
+    parser.add_argument("--dry-run", action="store_true", help="Only parse and report throughput; nothing is written")
+    parser.add_argument("--backfill-index", action="store_true", help="Add every archived file to the per-student (PRN) history index, then exit")
+    return parser
+
+def sign_in(args):
+    """Signs the teacher in; returns the FirebaseManager and user, or (None, None) after printing why not."""
+    from firebase_manager import FirebaseManager
+    fm = FirebaseManager()
+    success, user = fm.verify_user(args.email, args.password or getpass.getpass(f"Password for {args.email}: "))
+    if not success or user.get('role') != 'teacher':
+        print(f"Sign-in failed: {user if not success else 'account is not a teacher'}", file=sys.stderr)
+        return None, None
+    return fm, user
+
+def backfill_index(args):
+    if not args.email:
+        print("--backfill-index needs --email (or RESULT_ANALYZER_EMAIL).", file=sys.stderr)
+        return 2
+    fm, _ = sign_in(args)
+    if not fm: return 1
+    start = time.perf_counter()
+    def report(done, total): print(f"\rIndexed {done}/{total} files", end="", flush=True)
+    indexed = fm.backfill_student_index(report)
+    total = len(fm.list_result_files())
+    print(f"\nIndexed {indexed}/{total} files in {time.perf_counter() - start:.1f}s")
+    return 0 if indexed == total else 1
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.backfill_index:
+        return backfill_index(args)
+    if not (args.inputs and args.department and args.year):
+        parser.error("inputs, --department and --year are required")
+    if not (args.dry_run or args.output or args.push):
+        print("Nothing to do: pass --output, --push or --dry-run.", file=sys.stderr)
+        return 2
+    
+    paths = collect_pdf_paths(args.inputs)
+    if not paths:
+        print("No PDF files matched.", file=sys.stderr)
+        return 1
+    
+    fm, uploaded_by = None, None
+    if args.push and not args.dry_run:
+        if not args.email:
+            print("--push needs --email (or RESULT_ANALYZER_EMAIL).", file=sys.stderr)
+            return 2
+        fm, user = sign_in(args)
+        if not fm: return 1
+        uploaded_by = user['name']
+    
+    by_name = {os.path.basename(p): p for p in paths}
+    if len(by_name) != len(paths):
+        print("PDF file names must be unique across the inputs.", file=sys.stderr)
+        return 2
+    
+    def exam_tag_for(file_name):
+        return args.exam_tag.format(stem=os.path.splitext(file_name)[0])
+    
+    rows = []
+    def save(file_name, students, summary):
+        if args.output:
+            rows.append(({'File': file_name, 'Exam': exam_tag_for(file_name), 'Department': args.department, 'Year': args.year}, students))
+        if fm:
+            return fm.save_result_data(file_name, exam_tag_for(file_name), args.department, args.year, students, uploaded_by, summary, notify=False)
+        return file_name
+    
+    files, total_bytes = [], 0
+    for name, path in by_name.items():
+        with open(path, 'rb') as fh: data = fh.read()
+        total_bytes += len(data)
+        files.append((name, data))
+    
+    start = time.perf_counter()
+    statuses = BatchIngestor(parse_workers=args.workers, write_workers=args.write_workers).run(files, None if args.dry_run else save)
+    elapsed = time.perf_counter() - start
+    
+    for s in statuses:
+        line = f"{s['Status']:<7} {s['File']}  students={s['Students']}  parse={s['Parse (s)']}s"
+        if s['Error']: line += f"  error={s['Error']}"
+        print(line)
+    
+    students = sum(s['Students'] for s in statuses)
+    failed = sum(1 for s in statuses if s['Status'] == STATUS_FAILED)
+    parse_seconds = sum(s['Parse (s)'] or 0 for s in statuses)
+    print(f"\n{len(statuses) - failed}/{len(statuses)} files, {students} students in {elapsed:.2f}s wall "
+          f"({students / elapsed:,.0f} students/sec, {total_bytes / 1e6 / elapsed:.1f} MB/sec)")
+    if parse_seconds:
+        print(f"Parse time {parse_seconds:.2f}s across workers ({students / parse_seconds:,.0f} students/sec per worker)")
+    if fm:
+        from firebase_manager import get_request_latency_summary
+        http = get_request_latency_summary()
+        print(f"Firestore: {http['count']} requests ({http['retries']} retries), "
+              f"p50 {http['p50'] * 1000:.0f} ms, p95 {http['p95'] * 1000:.0f} ms, max {http['max'] * 1000:.0f} ms")
+    
+    if args.output and not args.dry_run and rows:
+        print(f"Wrote {write_output(rows, args.output)} rows to {args.output}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from analyzer import PARSER_VERSION
+
+class ParseCache:
+    """
+    Parsed student records keyed by a hash of the PDF bytes and the parser version.
+    An in-memory LRU tier is always used; a pickle-per-entry disk tier is added when
+    disk_dir is set, so the cache also survives a server restart.
+    """
+    def __init__(self, max_entries: int = 8, disk_dir: Optional[str] = None):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if disk_dir: os.makedirs(disk_dir, exist_ok=True)
+
+    @staticmethod
+    def key_for(pdf_bytes: bytes) -> str:
+        digest = hashlib.sha256(pdf_bytes).hexdigest()
+        return f"v{PARSER_VERSION}-{digest}"
+
+    def get(self, key: str) -> Optional[List[Dict]]:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+        students = self._read_disk(key)
+        with self._lock:
+            if students is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, students)
+        return students
+
+    def put(self, key: str, students: List[Dict]):
+        with self._lock:
+            self._remember(key, students)
+        self._write_disk(key, students)
+
+    def _remember(self, key, students):
+        self._entries[key] = students
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.pkl")
+
+    def _read_disk(self, key):
+        if not self.disk_dir: return None
+        try:
+            with open(self._disk_path(key), 'rb') as fh: return pickle.load(fh)
+        except (OSError, pickle.UnpicklingError, EOFError): return None
+
+    def _write_disk(self, key, students):
+        if not self.disk_dir: return
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.disk_dir, suffix=".tmp")
+            with os.fdopen(fd, 'wb') as fh: pickle.dump(students, fh, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._disk_path(key))
+        except OSError:
+            pass
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+def get_parse_cache() -> ParseCache:
+    """Process-wide cache shared by every Streamlit session. Set RESULT_PARSE_CACHE_DIR to enable the disk tier."""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = ParseCache(
+                max_entries=int(os.environ.get('RESULT_PARSE_CACHE_SIZE', 8)),
+                disk_dir=os.environ.get('RESULT_PARSE_CACHE_DIR') or None
+            )
+        return _shared_cache
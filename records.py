@@ -0,0 +1,111 @@
+import sys
+import threading
+from collections.abc import Mapping
+from typing import Dict, List
+
+# Small-integer grade codes. Known grades are fixed so codes agree across processes;
+# anything unexpected in a PDF gets the next free code on first sight.
+GRADE_LABELS = ['O', 'A+', 'A', 'B+', 'B', 'C', 'P', 'F', 'FF', 'Fail', 'AB', 'ABS', 'IC', 'N/A']
+_GRADE_CODES = {g: i for i, g in enumerate(GRADE_LABELS)}
+_grade_lock = threading.Lock()
+
+def grade_code(grade: str) -> int:
+    code = _GRADE_CODES.get(grade)
+    if code is None:
+        with _grade_lock:
+            code = _GRADE_CODES.get(grade)
+            if code is None:
+                GRADE_LABELS.append(sys.intern(grade))
+                code = _GRADE_CODES[grade] = len(GRADE_LABELS) - 1
+    return code
+
+FAIL_GRADE_CODES = frozenset(grade_code(g) for g in ['F', 'FF', 'AB', 'IC', 'ABS', 'Fail'])
+
+class SubjectRecord(Mapping):
+    """One subject row; reads like {'Course Code', 'Course Name', 'Grade'}."""
+    __slots__ = ('code', 'name', 'grade_code')
+    KEYS = ('Course Code', 'Course Name', 'Grade')
+
+    def __init__(self, code: str, name: str, grade: str):
+        self.code = sys.intern(code)
+        self.name = sys.intern(name)
+        self.grade_code = grade_code(grade)
+
+    @property
+    def grade(self) -> str:
+        return GRADE_LABELS[self.grade_code]
+
+    def __getitem__(self, key):
+        if key == 'Course Code': return self.code
+        if key == 'Course Name': return self.name
+        if key == 'Grade': return GRADE_LABELS[self.grade_code]
+        raise KeyError(key)
+
+    def __iter__(self): return iter(self.KEYS)
+    def __len__(self): return 3
+    def __repr__(self): return repr(self.to_dict())
+    # Pickle the grade label, not its code, so records survive a trip to another process
+    def __reduce__(self): return (SubjectRecord, (self.code, self.name, self.grade))
+
+    def to_dict(self) -> Dict:
+        return {'Course Code': self.code, 'Course Name': self.name, 'Grade': self.grade}
+
+    @classmethod
+    def from_dict(cls, row: Mapping) -> 'SubjectRecord':
+        return cls(row.get('Course Code') or '', row.get('Course Name') or '', row.get('Grade') or 'N/A')
+
+_STUDENT_FIELDS = {
+    'Seat No': lambda s: s.seat_no,
+    'Name': lambda s: s.name,
+    'Mother Name': lambda s: s.mother,
+    'PRN': lambda s: s.prn,
+    'SGPA': lambda s: s.sgpa,
+    'SGPA_Raw': lambda s: s.sgpa_raw,
+    'Credits': lambda s: s.credits,
+    'Subjects': lambda s: s.subjects,
+    'Passed Subjects': lambda s: s.passed_subjects,
+    'Total Subjects': lambda s: len(s.subjects),
+    'Result Status': lambda s: 'Pass' if s.sgpa > 0 else 'Fail',
+    'Has Valid SGPA': lambda s: s.sgpa > 0,
+}
+
+class StudentRecord(Mapping):
+    """
+    Compact parsed student. Derived fields (status, totals) are computed on access,
+    and the Mapping interface gives existing callers the same keys as the old dict.
+    """
+    __slots__ = ('seat_no', 'name', 'mother', 'prn', 'sgpa', 'sgpa_raw', 'credits', 'subjects', 'passed_subjects')
+
+    def __init__(self, seat_no: str, name: str, mother: str, prn: str, sgpa: float, sgpa_raw: str, credits: int, subjects: List[SubjectRecord]):
+        self.seat_no = seat_no
+        self.name = name
+        self.mother = mother
+        self.prn = prn
+        self.sgpa = sgpa
+        self.sgpa_raw = sys.intern(sgpa_raw)
+        self.credits = credits
+        self.subjects = subjects
+        self.passed_subjects = sum(1 for sub in subjects if sub.grade_code not in FAIL_GRADE_CODES)
+
+    def __getitem__(self, key):
+        try: getter = _STUDENT_FIELDS[key]
+        except KeyError: raise KeyError(key) from None
+        return getter(self)
+
+    def __iter__(self): return iter(_STUDENT_FIELDS)
+    def __len__(self): return len(_STUDENT_FIELDS)
+    def __repr__(self): return f"StudentRecord({self.prn!r}, {self.name!r}, SGPA={self.sgpa})"
+    def __reduce__(self): return (StudentRecord, (self.seat_no, self.name, self.mother, self.prn, self.sgpa, self.sgpa_raw, self.credits, self.subjects))
+
+    @classmethod
+    def from_dict(cls, row: Mapping) -> 'StudentRecord':
+        """Compact form of a student dict as stored in Firestore."""
+        if isinstance(row, cls): return row
+        subjects = [SubjectRecord.from_dict(sub) for sub in row.get('Subjects') or []]
+        return cls(row.get('Seat No', 'Unknown'), row.get('Name', 'Unknown'), row.get('Mother Name', 'Unknown'), row.get('PRN', 'Unknown'),
+                   float(row.get('SGPA') or 0.0), str(row.get('SGPA_Raw', row.get('SGPA', '0.0'))), int(row.get('Credits') or 0), subjects)
+
+    def to_dict(self) -> Dict:
+        row = {key: getter(self) for key, getter in _STUDENT_FIELDS.items()}
+        row['Subjects'] = [sub.to_dict() for sub in self.subjects]
+        return row
@@ -0,0 +1,179 @@
+import bisect
+from typing import Dict, List, Optional, Tuple
+from utils import lazy_import
+
+np = lazy_import('numpy')
+
+# Fuzzy matches below this trigram similarity are dropped
+MIN_SIMILARITY = 0.3
+
+def normalize(text: str) -> str:
+    return ' '.join((text or '').upper().split())
+
+def trigrams(text: str) -> set:
+    """Word trigrams padded like pg_trgm ('  W', ' WO', 'WOR', 'RD ')."""
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+class StudentSearchIndex:
+    """
+    Search over PRN -> name pairs, built once per identifier set.
+
+    Prefix lookups bisect a sorted vocabulary (every name word and the PRN) whose entries
+    point at slices of one student-id array: the same queries as a prefix trie, in
+    compact arrays. Typos are handled per word: each query word is scored by trigram
+    (Jaccard) similarity against the name words, so one misspelt word of a long name still
+    matches. query() ranks exact PRN, then prefix, then fuzzy matches and returns the top k.
+    """
+    def __init__(self, identifiers: Dict[str, str]):
+        self.prns = list(identifiers)
+        self.names = [normalize(identifiers[prn]) for prn in self.prns]
+        self.display_names = [identifiers[prn] for prn in self.prns]
+        keys = [normalize(prn) for prn in self.prns]
+        self._id_of_prn = {key: i for i, key in enumerate(keys)}
+
+        # Distinct tokens (name words and PRNs) and one (token, student) pair per occurrence
+        token_id, vocab, pair_token, pair_student = {}, [], [], []
+        word_grams = {}
+        for i, name in enumerate(self.names):
+            words = set(name.split())
+            for word in words:
+                if word not in word_grams: word_grams[word] = trigrams(word)
+            for token in words | {keys[i]}:
+                t = token_id.get(token)
+                if t is None:
+                    t = token_id[token] = len(vocab)
+                    vocab.append(token)
+                pair_token.append(t)
+                pair_student.append(i)
+
+        # Sorted vocabulary + per-token slices of student ids: prefix ranges come from bisect
+        order = sorted(range(len(vocab)), key=vocab.__getitem__)
+        rank = np.empty(len(vocab), dtype=np.int64)
+        rank[order] = np.arange(len(vocab))
+        pair_rank = rank[np.array(pair_token, dtype=np.int64)]
+        pair_student = np.array(pair_student, dtype=np.int32)
+        by_token = np.lexsort((pair_student, pair_rank))
+        self._vocab = [vocab[t] for t in order]
+        self._token_ids = pair_student[by_token]
+        self._token_offsets = np.searchsorted(pair_rank[by_token], np.arange(len(vocab) + 1))
+
+        # Trigram -> name words (vocabulary positions) for typo matching, and trigram -> students
+        # (merged from the slices of those words) for substring checks
+        word_slices, slices = {}, {}
+        self._word_gram_counts = np.zeros(len(vocab), dtype=np.int32)
+        for word, grams in word_grams.items():
+            r = rank[token_id[word]]
+            self._word_gram_counts[r] = len(grams)
+            for gram in grams:
+                word_slices.setdefault(gram, []).append(r)
+                slices.setdefault(gram, []).append(self._token_ids[self._token_offsets[r]:self._token_offsets[r + 1]])
+        self._word_postings = {gram: np.unique(np.array(words, dtype=np.int64)) for gram, words in word_slices.items()}
+        self._postings = {gram: np.unique(np.concatenate(parts)) for gram, parts in slices.items()}
+        # Position in (name, PRN) order, the tie-break between equal scores
+        self._name_rank = np.empty(len(self.prns), dtype=np.int64)
+        self._name_rank[sorted(range(len(self.prns)), key=lambda i: (self.names[i], self.prns[i]))] = np.arange(len(self.prns))
+
+    def __len__(self):
+        return len(self.prns)
+
+    def find_prn(self, text: str) -> Optional[str]:
+        """The indexed PRN equal to text ignoring case and spacing, or None."""
+        i = self._id_of_prn.get(normalize(text))
+        return None if i is None else self.prns[i]
+
+    def _token_range(self, lo: int, hi: int):
+        return self._token_ids[self._token_offsets[lo]:self._token_offsets[hi]]
+
+    def _prefix_ids(self, prefix: str):
+        lo = bisect.bisect_left(self._vocab, prefix)
+        hi = bisect.bisect_left(self._vocab, prefix + '\uffff')
+        return np.unique(self._token_range(lo, hi))
+
+    def _token_ids_exact(self, token: str):
+        lo = bisect.bisect_left(self._vocab, token)
+        return self._token_range(lo, lo + 1) if lo < len(self._vocab) and self._vocab[lo] == token else self._token_ids[:0]
+
+    def prefix_matches(self, query: str):
+        """Ids whose PRN or name words start with every query token, in index order."""
+        tokens = normalize(query).split()
+        if not tokens: return np.empty(0, dtype=np.int32)
+        ids = self._prefix_ids(tokens[0])
+        for token in tokens[1:]:
+            if not ids.size: break
+            ids = np.intersect1d(ids, self._prefix_ids(token), assume_unique=True)
+        return ids
+
+    def _similar_words(self, word: str, min_similarity: float):
+        """(vocabulary positions, similarity) of name words whose trigrams overlap word's."""
+        grams = trigrams(word)
+        lists = [self._word_postings[g] for g in grams if g in self._word_postings]
+        if not lists: return np.empty(0, dtype=np.int64), np.empty(0)
+        words, shared = np.unique(np.concatenate(lists), return_counts=True)
+        similarity = shared / (len(grams) + self._word_gram_counts[words] - shared)
+        keep = similarity >= min_similarity
+        return words[keep], similarity[keep]
+
+    def fuzzy_matches(self, query: str, min_similarity: float = MIN_SIMILARITY):
+        """
+        (ids, similarity) of names close to the query: each query word takes its best match
+        among the name's words, and the similarity is the mean over query words.
+        """
+        words = normalize(query).split()
+        if not words or not self.prns: return np.empty(0, dtype=np.int64), np.empty(0)
+        total = np.zeros(len(self.prns))
+        for word in words:
+            vocab_pos, similarity = self._similar_words(word, min_similarity)
+            if not vocab_pos.size: continue
+            lo, hi = self._token_offsets[vocab_pos], self._token_offsets[vocab_pos + 1]
+            ids = np.concatenate([self._token_ids[a:b] for a, b in zip(lo.tolist(), hi.tolist())])
+            best = np.zeros(len(self.prns))
+            np.maximum.at(best, ids, np.repeat(similarity, hi - lo))
+            total += best
+        total /= len(words)
+        ids = np.flatnonzero(total >= min_similarity)
+        return ids, total[ids]
+
+    def substring_matches(self, text: str) -> List[int]:
+        """Ids whose name contains text, narrowed by the trigram postings before checking."""
+        text = normalize(text)
+        inner = {text[i:i + 3] for i in range(len(text) - 2)}
+        inner = [g for g in inner if ' ' not in g]
+        if not inner:
+            candidates = range(len(self.names))
+        elif any(g not in self._postings for g in inner):
+            return []
+        else:
+            candidates = self._postings[inner[0]]
+            for g in inner[1:]: candidates = np.intersect1d(candidates, self._postings[g], assume_unique=True)
+            candidates = candidates.tolist()
+        return [i for i in candidates if text in self.names[i]]
+
+    def query(self, text: str, k: int = 10) -> List[Tuple[str, str, float]]:
+        """Top k (PRN, name, score): exact PRN 3, prefix matches 2-2.5 (whole words first), fuzzy 0-1."""
+        text = normalize(text)
+        if not text or not self.prns: return []
+        ids, scores = [], []
+        exact = self._id_of_prn.get(text)
+        if exact is not None:
+            ids.append(np.array([exact])); scores.append(np.array([3.0]))
+        fuzzy_ids, similarity = self.fuzzy_matches(text)
+        ids.append(fuzzy_ids); scores.append(similarity)
+        prefix_ids = self.prefix_matches(text)
+        if prefix_ids.size:
+            words = set(text.split())
+            whole_words = sum(np.isin(prefix_ids, self._token_ids_exact(w)) for w in words) / len(words)
+            ids.append(prefix_ids); scores.append(2.0 + 0.5 * whole_words)
+        ids = np.concatenate(ids).astype(np.int64)
+        if not ids.size: return []
+        scores = np.concatenate(scores).astype(np.float64)
+        # Best score per id
+        order = np.lexsort((-scores, ids))
+        ids, scores = ids[order], scores[order]
+        first = np.r_[True, ids[1:] != ids[:-1]]
+        ids, scores = ids[first], scores[first]
+        top = np.lexsort((self._name_rank[ids], -scores))[:k]
+        return [(self.prns[i], self.display_names[i], round(float(score), 3)) for i, score in zip(ids[top].tolist(), scores[top].tolist())]
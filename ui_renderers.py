@@ -1,10 +1,87 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-import numpy as np
 from collections import defaultdict
-from utils import convert_df_to_excel
+from records import GRADE_LABELS
+from utils import EXPORT_FORMATS, XLSX_MIME, available_export_formats, convert_sheets_to_excel, export_df_cached, lazy_import
+
+pd = lazy_import('pandas')
+px = lazy_import('plotly.express')
+np = lazy_import('numpy')
+
+# Streamlit 1.52+ accepts a callable for data and only calls it when the button is clicked
+_DEFERRED_DOWNLOADS = tuple(int(p) for p in st.__version__.split('.')[:2]) >= (1, 52)
+
+def download_df_button(df, label, file_name, key):
+    """
+    Download for df in the format picked next to the button (Excel, CSV, Parquet).
+    The file is only built (and cached) when a download is requested.
+    """
+    fmt = st.radio("Format", available_export_formats(), horizontal=True, key=f"{key}_fmt", label_visibility="collapsed")
+    ext, mime, _ = EXPORT_FORMATS[fmt]
+    label = label.replace("(Excel)", f"({fmt})")
+    file_name = f"{file_name.rsplit('.', 1)[0]}.{ext}"
+    if _DEFERRED_DOWNLOADS:
+        return st.download_button(label=label, data=lambda: export_df_cached(df, fmt), file_name=file_name, mime=mime, key=key)
+    if st.session_state.get(f"{key}_prepared") == fmt or st.button(f"{label} (prepare)", key=f"{key}_prepare"):
+        st.session_state[f"{key}_prepared"] = fmt
+        return st.download_button(label=label, data=export_df_cached(df, fmt), file_name=file_name, mime=mime, key=key)
+    return False
+
+TOP_PERFORMER_COLS = ['Seat No', 'Name', 'SGPA', 'Result Status', 'Passed Subjects']
+FAILED_STUDENT_COLS = ['Seat No', 'Name', 'SGPA_Raw', 'Passed Subjects']
+
+def registry_df(analyzer):
+    return pd.DataFrame([ {k:v for k,v in s.items() if k!='Subjects'} for s in analyzer.students_data ])
+
+def subject_toppers_df(analyzer, subject, n=10):
+    student_idx, grade_codes = analyzer.get_subject_toppers(subject, n)
+    rows = []
+    for i, code in zip(student_idx.tolist(), grade_codes.tolist()):
+        s = analyzer.students_data[i]
+        rows.append({'Seat No': s.get('Seat No'), 'Name': s.get('Name'), 'Grade': GRADE_LABELS[code], 'PRN': s.get('PRN'), 'SGPA': s.get('SGPA', 0)})
+    return pd.DataFrame(rows)
+
+def grade_matrix_df(analyzer):
+    """Students x subjects sheet of grade labels (blank where a subject was not taken)."""
+    gm = analyzer.get_grade_matrix()
+    labels = np.array(GRADE_LABELS + [''], dtype=object)  # code -1 picks the trailing ''
+    columns = [f"{name} ({code})" for code, name in zip(gm['course_codes'], gm['course_names'])]
+    df = pd.DataFrame(labels[gm['matrix']], columns=columns)
+    for i, field in enumerate(['Seat No', 'PRN', 'Name']):
+        df.insert(i, field, [s.get(field) for s in analyzer.students_data])
+    return df
+
+def build_analysis_sheets(analyzer):
+    """Every analysis table, each derived once from the analyzer's cached aggregates."""
+    summary = pd.DataFrame(analyzer.get_subject_grade_summary())
+    if 'Failure Rate (%)' in summary.columns:
+        summary = summary.sort_values(by='Failure Rate (%)', ascending=False)
+    top = pd.DataFrame(analyzer.get_top_students(50))
+    failed = pd.DataFrame(analyzer.get_failed_students())
+    subject_names = sorted(analyzer.get_subject_index()['by_name'])
+    toppers = []
+    for name in subject_names:
+        df = subject_toppers_df(analyzer, name)
+        df.insert(0, 'Course Name', name)
+        toppers.append(df)
+    return {
+        'Summary': pd.DataFrame([analyzer.get_result_summary()]),
+        'Top Performers': top[TOP_PERFORMER_COLS] if not top.empty else top,
+        'Failures': failed[FAILED_STUDENT_COLS] if not failed.empty else failed,
+        'Subject Summary': summary,
+        'Subject Toppers': pd.concat(toppers, ignore_index=True) if toppers else pd.DataFrame(),
+        'Registry': registry_df(analyzer),
+        'Grade Matrix': grade_matrix_df(analyzer),
+    }
+
+def render_full_export(analyzer, key_prefix="full"):
+    """One workbook with every analysis table as a sheet, built only when downloaded."""
+    build = lambda: convert_sheets_to_excel(build_analysis_sheets(analyzer))
+    data = build if _DEFERRED_DOWNLOADS else None
+    if data is None and (st.session_state.get(f"{key_prefix}_prepared") or st.button("📦 Prepare Full Analysis", key=f"{key_prefix}_prepare")):
+        st.session_state[f"{key_prefix}_prepared"] = True
+        data = build()
+    if data is not None:
+        st.download_button(label="📦 Export Full Analysis (Excel)", data=data, file_name="Full_Analysis.xlsx", mime=XLSX_MIME, key=f"{key_prefix}_dl_full")
 
 def render_student_profile(student_history, analyzer):
     # PROFESSIONAL PROFILE CARD
@@ -24,14 +101,7 @@ def render_student_profile(student_history, analyzer):
         # EXCEL EXPORT FOR STUDENT HISTORY
         c1, c2 = st.columns([8, 2])
         with c2:
-            excel_data = convert_df_to_excel(results_df)
-            st.download_button(
-                label="📥 Download History (Excel)",
-                data=excel_data,
-                file_name=f"{student_history['Name']}_History.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                key="download_student_history"
-            )
+            download_df_button(results_df, "📥 Download History (Excel)", f"{student_history['Name']}_History.xlsx", key="download_student_history")
 
         # PREDICTION & FAILURE ALERTS
         predicted_sgpa = analyzer.predict_next_sgpa(student_history)
@@ -187,14 +257,7 @@ def render_student_profile(student_history, analyzer):
                         st.dataframe(sub_df, use_container_width=True, hide_index=True)
                         
                         # EXCEL EXPORT FOR INDIVIDUAL SEMESTER
-                        sem_excel = convert_df_to_excel(sub_df)
-                        st.download_button(
-                            label=f"📥 Download Transcript",
-                            data=sem_excel,
-                            file_name=f"{student_history['Name']}_{result['Exam']}.xlsx",
-                            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                            key=f"dl_sem_{i}"
-                        )
+                        download_df_button(sub_df, f"📥 Download Transcript", f"{student_history['Name']}_{result['Exam']}.xlsx", key=f"dl_sem_{i}")
     else:
         st.info("No detailed result history available.")
 
@@ -217,9 +280,8 @@ def render_overview_dashboard(analyzer, key_prefix="overview"):
     
     c1, c2 = st.columns(2)
     with c1:
-        valid_students = [s for s in analyzer.students_data if s.get('Has Valid SGPA')]
-        sgpas = [s['SGPA'] for s in valid_students]
-        if sgpas:
+        sgpas = analyzer.get_valid_sgpas()
+        if sgpas.size:
             fig = px.histogram(x=sgpas, nbins=20, title="SGPA Distribution", color_discrete_sequence=['#00d4ff'], template="plotly_dark")
             fig.update_layout(paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)")
             st.plotly_chart(fig, use_container_width=True)
@@ -232,32 +294,18 @@ def render_overview_dashboard(analyzer, key_prefix="overview"):
 
     # Export Summary Data
     summary_df = pd.DataFrame([summary])
-    excel_data = convert_df_to_excel(summary_df)
-    st.download_button(
-        label="📥 Download Overview Stats",
-        data=excel_data,
-        file_name="Class_Overview.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        key=f"{key_prefix}_dl_overview"
-    )
+    download_df_button(summary_df, "📥 Download Overview Stats", "Class_Overview.xlsx", key=f"{key_prefix}_dl_overview")
 
 def render_top_performers(analyzer, key_prefix="top"):
     st.markdown("### <i class='fas fa-trophy'></i> Top Performers", unsafe_allow_html=True)
     top_students = analyzer.get_top_students(50) 
     if top_students:
         df = pd.DataFrame(top_students)
-        display_cols = ['Seat No', 'Name', 'SGPA', 'Result Status', 'Passed Subjects']
+        display_cols = TOP_PERFORMER_COLS
         st.dataframe(df[display_cols].head(10), use_container_width=True)
         
         # EXPORT
-        excel_data = convert_df_to_excel(df[display_cols])
-        st.download_button(
-            label="📥 Download Top Performers List (Excel)",
-            data=excel_data,
-            file_name="Top_Performers.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            key=f"{key_prefix}_dl_top"
-        )
+        download_df_button(df[display_cols], "📥 Download Top Performers List (Excel)", "Top_Performers.xlsx", key=f"{key_prefix}_dl_top")
 
 def render_failed_analysis(analyzer, key_prefix="fail"):
     st.markdown("### <i class='fas fa-user-times'></i> Failure Analysis", unsafe_allow_html=True)
@@ -266,18 +314,11 @@ def render_failed_analysis(analyzer, key_prefix="fail"):
         st.success("🎉 All students passed!")
         return
     df = pd.DataFrame(failed)
-    display_cols = ['Seat No', 'Name', 'SGPA_Raw', 'Passed Subjects']
+    display_cols = FAILED_STUDENT_COLS
     st.dataframe(df[display_cols], use_container_width=True)
 
     # EXPORT
-    excel_data = convert_df_to_excel(df[display_cols])
-    st.download_button(
-        label="📥 Download Failed Students List (Excel)",
-        data=excel_data,
-        file_name="Failed_Students.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        key=f"{key_prefix}_dl_fail"
-    )
+    download_df_button(df[display_cols], "📥 Download Failed Students List (Excel)", "Failed_Students.xlsx", key=f"{key_prefix}_dl_fail")
 
 def render_subject_summary(analyzer, key_prefix="sub"):
     st.markdown("### <i class='fas fa-book'></i> Subject-wise Grade Distribution", unsafe_allow_html=True)
@@ -292,11 +333,11 @@ def render_subject_summary(analyzer, key_prefix="sub"):
         df = df.sort_values(by='Failure Rate (%)', ascending=False)
     
     # Student Filter
-    student_names = ["All Students"] + sorted(list(set([s.get('Name', 'Unknown') for s in analyzer.students_data])))
+    student_names = ["All Students"] + analyzer.get_student_index()['names']
     selected_student = st.selectbox("Filter Subjects by Student", student_names, key=f"{key_prefix}_student_filter")
     
     if selected_student != "All Students":
-        student = next((s for s in analyzer.students_data if s.get('Name') == selected_student), None)
+        student = analyzer.find_student(selected_student)
         if student:
             student_subjects = [sub.get('Course Name') for sub in student.get('Subjects', [])]
             df = df[df['Course Name'].isin(student_subjects)]
@@ -343,14 +384,7 @@ def render_subject_summary(analyzer, key_prefix="sub"):
             st.plotly_chart(fig, use_container_width=True)
             
     # Export
-    excel_data = convert_df_to_excel(df)
-    st.download_button(
-        label="📥 Download Subject Analysis",
-        data=excel_data,
-        file_name="Subject_Analysis.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        key=f"{key_prefix}_dl_sub"
-    )
+    download_df_button(df, "📥 Download Subject Analysis", "Subject_Analysis.xlsx", key=f"{key_prefix}_dl_sub")
 
     st.markdown("---")
     st.markdown("### 🔬 Individual Subject Analysis", unsafe_allow_html=True)
@@ -409,35 +443,15 @@ def render_subject_summary(analyzer, key_prefix="sub"):
         # Topper List Table
         st.markdown(f"#### 🏆 Top Performers in {selected_subject}")
         
-        subject_students = []
-        for s in analyzer.students_data:
-            for sub in s.get('Subjects', []):
-                if sub.get('Course Name') == selected_subject:
-                    subject_students.append({'Seat No': s.get('Seat No'), 'Name': s.get('Name'), 'Grade': sub.get('Grade'), 'PRN': s.get('PRN'), 'SGPA': s.get('SGPA', 0)})
-        
-        if subject_students:
-            df_sub_students = pd.DataFrame(subject_students)
-            grade_priority = {g: i for i, g in enumerate(['O', 'A+', 'A', 'B+', 'B', 'C', 'P', 'F', 'FF', 'Fail', 'AB', 'ABS'])}
-            df_sub_students['Grade_Rank'] = df_sub_students['Grade'].map(lambda x: grade_priority.get(x, 100))
-            
-            # Sort by Grade (Ascending Rank) then SGPA (Descending)
-            df_sub_students = df_sub_students.sort_values(by=['Grade_Rank', 'SGPA'], ascending=[True, False])
-            toppers_df = df_sub_students.head(10).drop(columns=['Grade_Rank'])
-            
+        toppers_df = subject_toppers_df(analyzer, selected_subject)
+        if not toppers_df.empty:
             st.dataframe(toppers_df, use_container_width=True)
             
-            excel_data = convert_df_to_excel(toppers_df)
-            st.download_button(
-                label=f"📥 Download {selected_subject} Toppers",
-                data=excel_data,
-                file_name=f"{selected_subject}_Toppers.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                key=f"{key_prefix}_dl_sub_toppers"
-            )
+            download_df_button(toppers_df, f"📥 Download {selected_subject} Toppers", f"{selected_subject}_Toppers.xlsx", key=f"{key_prefix}_dl_sub_toppers")
 
 def render_detailed_data(analyzer, key_prefix="detailed"):
     st.markdown("### <i class='fas fa-list'></i> Complete Student Registry", unsafe_allow_html=True)
-    df = pd.DataFrame([ {k:v for k,v in s.items() if k!='Subjects'} for s in analyzer.students_data ])
+    df = registry_df(analyzer)
     
     c1, c2, c3 = st.columns(3)
     with c1: 
@@ -455,20 +469,13 @@ def render_detailed_data(analyzer, key_prefix="detailed"):
     st.dataframe(filtered, use_container_width=True)
 
     # EXPORT
-    excel_data = convert_df_to_excel(filtered)
-    st.download_button(
-        label="📥 Download Filtered Data (Excel)",
-        data=excel_data,
-        file_name="Detailed_Student_Data.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        key=f"{key_prefix}_dl_detailed"
-    )
+    download_df_button(filtered, "📥 Download Filtered Data (Excel)", "Detailed_Student_Data.xlsx", key=f"{key_prefix}_dl_detailed")
 
 def render_college_overview(fm):
     st.markdown("### 🏛️ Institutional Performance Overview", unsafe_allow_html=True)
     
     with st.spinner("Aggregating institutional data..."):
-        files = fm.get_all_result_files()
+        files = fm.list_result_files()
     
     if not files:
         st.info("No data available. Upload result files to see analytics.")
@@ -568,56 +575,44 @@ def render_advanced_analytics(analyzer, key_prefix="adv"):
     st.markdown("### 📈 Advanced Statistical Analysis", unsafe_allow_html=True)
     
     # 1. SGPA Statistics
-    valid_students = [s for s in analyzer.students_data if s.get('Has Valid SGPA')]
-    sgpas = [s['SGPA'] for s in valid_students]
+    stats = analyzer.get_sgpa_statistics()
     
-    if sgpas:
+    if stats:
         c1, c2 = st.columns([1, 1])
         with c1:
             st.markdown('<div class="glass-card">', unsafe_allow_html=True)
             st.markdown("##### SGPA Distribution Statistics")
-            st.write(f"**Mean SGPA:** {np.mean(sgpas):.2f}")
-            st.write(f"**Median SGPA:** {np.median(sgpas):.2f}")
-            try:
-                mode_val = float(max(set(sgpas), key=sgpas.count))
-                st.write(f"**Mode SGPA:** {mode_val:.2f}")
-            except:
-                st.write("**Mode SGPA:** N/A")
-            st.write(f"**Standard Deviation:** {np.std(sgpas):.2f}")
-            st.write(f"**Range:** {np.min(sgpas)} - {np.max(sgpas)}")
+            st.write(f"**Mean SGPA:** {stats['mean']:.2f}")
+            st.write(f"**Median SGPA:** {stats['median']:.2f}")
+            st.write(f"**Mode SGPA:** {stats['mode']:.2f}")
+            st.write(f"**Standard Deviation:** {stats['std']:.2f}")
+            st.write(f"**Range:** {stats['min']} - {stats['max']}")
             
-            p90 = np.percentile(sgpas, 90)
-            p10 = np.percentile(sgpas, 10)
             st.markdown("---")
-            st.write(f"**Top 10% Cutoff:** > {p90:.2f}")
-            st.write(f"**Bottom 10% Cutoff:** < {p10:.2f}")
+            st.write(f"**Top 10% Cutoff:** > {stats['p90']:.2f}")
+            st.write(f"**Bottom 10% Cutoff:** < {stats['p10']:.2f}")
             st.markdown('</div>', unsafe_allow_html=True)
         
         with c2:
             st.markdown('<div class="glass-card">', unsafe_allow_html=True)
-            fig_box = px.box(y=sgpas, title="SGPA Box Plot", template="plotly_dark")
+            fig_box = px.box(y=analyzer.get_valid_sgpas(), title="SGPA Box Plot", template="plotly_dark")
             fig_box.update_layout(paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)")
             st.plotly_chart(fig_box, use_container_width=True)
             st.markdown('</div>', unsafe_allow_html=True)
 
     # 2. Subject Heatmap
     st.markdown("### 🔥 Subject Grade Heatmap", unsafe_allow_html=True)
-    summary_list = analyzer.get_subject_grade_summary()
-    if summary_list:
-        df_sub = pd.DataFrame(summary_list)
-        grades = ['O', 'A+', 'A', 'B+', 'B', 'C', 'P', 'F']
-        available_grades = [g for g in grades if g in df_sub.columns]
-        
-        if available_grades:
-            heatmap_data = df_sub.set_index('Course Name')[available_grades]
-            fig_heat = px.imshow(
-                heatmap_data, 
-                labels=dict(x="Grade", y="Subject", color="Count"),
-                x=available_grades,
-                title="Grade Concentration Heatmap",
-                template="plotly_dark",
-                aspect="auto",
-                color_continuous_scale='Viridis'
-            )
-            fig_heat.update_layout(paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)")
-            st.plotly_chart(fig_heat, use_container_width=True)
\ No newline at end of file
+    grade_counts = analyzer.get_subject_grade_counts()
+    if grade_counts['course_names']:
+        fig_heat = px.imshow(
+            grade_counts['counts'], 
+            labels=dict(x="Grade", y="Subject", color="Count"),
+            x=grade_counts['grades'],
+            y=grade_counts['course_names'],
+            title="Grade Concentration Heatmap",
+            template="plotly_dark",
+            aspect="auto",
+            color_continuous_scale='Viridis'
+        )
+        fig_heat.update_layout(paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)")
+        st.plotly_chart(fig_heat, use_container_width=True)
\ No newline at end of file
@@ -1,6 +1,69 @@
 import io
-import pandas as pd
+import os
+import importlib
+import importlib.util
 import datetime
+import hashlib
+import threading
+from collections import OrderedDict
+
+class lazy_import:
+    """
+    Module proxy that defers the real import until an attribute is first used,
+    so heavy libraries are only paid for on the code paths that need them.
+    """
+    def __init__(self, name):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_module']
+        if module is None:
+            module = importlib.import_module(self.__dict__['_name'])
+            self.__dict__['_module'] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = 'loaded' if self.__dict__['_module'] is not None else 'not loaded'
+        return f"<lazy module '{self.__dict__['_name']}' ({state})>"
+
+pd = lazy_import('pandas')
+
+def _naive_datetime(x):
+    return x.replace(tzinfo=None) if isinstance(x, (datetime.datetime, pd.Timestamp)) else x
+
+def strip_timezones(df):
+    """
+    Returns df with timezone-aware datetimes made naive (wall time kept), since Excel
+    rejects them. Columns are checked by dtype / inferred type; only the columns that
+    actually hold datetimes are converted, and df itself is not copied otherwise.
+    """
+    fixed = {}
+    for i, (col, dtype) in enumerate(df.dtypes.items()):
+        if isinstance(dtype, pd.DatetimeTZDtype):
+            fixed[i] = df.iloc[:, i].dt.tz_localize(None)
+        elif dtype == object:
+            series = df.iloc[:, i]
+            kind = pd.api.types.infer_dtype(series, skipna=True)
+            if kind == 'datetime':
+                try:
+                    converted = pd.to_datetime(series)
+                    fixed[i] = converted.dt.tz_localize(None) if isinstance(converted.dtype, pd.DatetimeTZDtype) else converted
+                    continue
+                except (ValueError, TypeError):
+                    pass  # mixed offsets; fall back to per cell below
+            if kind in ('datetime', 'mixed'):
+                fixed[i] = series.map(_naive_datetime)
+    if not fixed: return df
+    df_export = df.copy(deep=False)
+    for i, series in fixed.items(): df_export.isetitem(i, series)
+    return df_export
 
 def convert_df_to_excel(df):
     """
@@ -8,20 +71,7 @@ def convert_df_to_excel(df):
     Includes FIX for ValueError: Excel does not support datetimes with timezones.
     """
     output = io.BytesIO()
-    
-    # --- TIMEZONE FIX START ---
-    df_export = df.copy()
-    for col in df_export.columns:
-        if df_export[col].dtype == object:
-            try:
-                df_export[col] = df_export[col].apply(
-                    lambda x: x.replace(tzinfo=None) if isinstance(x, (datetime.datetime, pd.Timestamp)) else x
-                )
-            except Exception:
-                pass
-        if pd.api.types.is_datetime64_any_dtype(df_export[col]):
-            df_export[col] = df_export[col].dt.tz_localize(None)
-    # --- TIMEZONE FIX END ---
+    df_export = strip_timezones(df)
 
     try:
         with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
@@ -31,6 +81,117 @@ def convert_df_to_excel(df):
             
     return output.getvalue()
 
+XLSX_MIME = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+def convert_sheets_to_excel(sheets):
+    """Writes {sheet name: DataFrame} into one workbook in a single pass; names are cut to Excel's 31 characters."""
+    output = io.BytesIO()
+    engine = 'xlsxwriter' if importlib.util.find_spec('xlsxwriter') else None
+    with pd.ExcelWriter(output, engine=engine) as writer:
+        for name, df in sheets.items():
+            strip_timezones(df).to_excel(writer, index=False, sheet_name=name[:31])
+    return output.getvalue()
+
+# Rows converted per step by the CSV / Parquet writers, so memory stays bounded on large registries
+EXPORT_CHUNK_ROWS = 50_000
+
+def write_csv_chunked(df, dest, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Writes df as UTF-8 CSV to a path or binary file object, chunk_rows rows at a time."""
+    if isinstance(dest, (str, os.PathLike)):
+        with open(dest, 'wb') as fh: return write_csv_chunked(df, fh, chunk_rows)
+    text = io.TextIOWrapper(dest, encoding='utf-8', newline='', write_through=True)
+    try:
+        for start in range(0, max(len(df), 1), chunk_rows):
+            df.iloc[start:start + chunk_rows].to_csv(text, index=False, header=start == 0)
+    finally:
+        text.detach()  # leave dest open for the caller
+    return len(df)
+
+def _arrow_compatible(df):
+    """
+    Returns df with object columns Arrow cannot type as one column (e.g. history dates where
+    one value stayed a string) converted to strings, nulls kept. df is not copied otherwise.
+    """
+    import pyarrow as pa
+    fixed = {}
+    for i, dtype in enumerate(df.dtypes):
+        if dtype != object: continue
+        series = df.iloc[:, i]
+        try:
+            pa.array(series, from_pandas=True)
+        except (pa.ArrowTypeError, pa.ArrowInvalid):
+            fixed[i] = series.where(series.isna(), series.astype(str))
+    if not fixed: return df
+    df_export = df.copy(deep=False)
+    for i, series in fixed.items(): df_export.isetitem(i, series)
+    return df_export
+
+def write_parquet_chunked(df, dest, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Writes df as Parquet to a path or binary file object, one row group per chunk_rows rows."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    try:
+        schema = pa.Schema.from_pandas(df, preserve_index=False)
+    except (pa.ArrowTypeError, pa.ArrowInvalid):
+        df = _arrow_compatible(df)
+        schema = pa.Schema.from_pandas(df, preserve_index=False)
+    with pq.ParquetWriter(dest, schema) as writer:
+        for start in range(0, len(df), chunk_rows):
+            writer.write_table(pa.Table.from_pandas(df.iloc[start:start + chunk_rows], schema=schema, preserve_index=False))
+    return len(df)
+
+def _to_csv_bytes(df):
+    output = io.BytesIO()
+    write_csv_chunked(df, output)
+    return output.getvalue()
+
+def _to_parquet_bytes(df):
+    output = io.BytesIO()
+    write_parquet_chunked(df, output)
+    return output.getvalue()
+
+# Download format -> (file extension, mime type, writer)
+EXPORT_FORMATS = {
+    'Excel': ('xlsx', XLSX_MIME, convert_df_to_excel),
+    'CSV': ('csv', 'text/csv', _to_csv_bytes),
+    'Parquet': ('parquet', 'application/vnd.apache.parquet', _to_parquet_bytes),
+}
+
+def available_export_formats():
+    return [f for f in EXPORT_FORMATS if f != 'Parquet' or importlib.util.find_spec('pyarrow') is not None]
+
+# Exports already built this process, keyed by (DataFrame content hash, format) (shared by all sessions)
+EXPORT_CACHE_SIZE = 32
+_export_cache = OrderedDict()
+_export_cache_lock = threading.Lock()
+
+def dataframe_fingerprint(df):
+    """Content hash of a DataFrame (values, index, columns, dtypes), or None if a cell is unhashable."""
+    try:
+        row_hashes = pd.util.hash_pandas_object(df, index=True).values
+    except TypeError:
+        return None
+    h = hashlib.sha256(row_hashes.tobytes())
+    h.update(repr([(str(c), str(t)) for c, t in df.dtypes.items()]).encode())
+    return h.hexdigest()
+
+def export_df_cached(df, fmt='Excel'):
+    """EXPORT_FORMATS[fmt] writer behind a bounded LRU, so an unchanged table is only written once per format."""
+    writer = EXPORT_FORMATS[fmt][2]
+    fingerprint = dataframe_fingerprint(df)
+    if fingerprint is None: return writer(df)
+    key = (fingerprint, fmt)
+    with _export_cache_lock:
+        data = _export_cache.get(key)
+        if data is not None:
+            _export_cache.move_to_end(key)
+            return data
+    data = writer(df)
+    with _export_cache_lock:
+        _export_cache[key] = data
+        while len(_export_cache) > EXPORT_CACHE_SIZE: _export_cache.popitem(last=False)
+    return data
+
 def flatten_student_data_for_export(students_data):
     """
     Flattens the nested student objects for a clean Excel export.